@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas,
+                                   dispatch_uid='core.sqlite_pragmas')
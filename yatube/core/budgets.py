@@ -0,0 +1,21 @@
+from collections import namedtuple
+
+Budget = namedtuple('Budget', ['queries', 'ms'])
+
+# Допустимые число SQL-запросов и время ответа для страниц
+# с холодным кэшем и авторизованным пользователем. Два запроса
+# из каждого бюджета — сессия и пользователь. Страницы с ETag
+# тратят ещё один на валидатор: без общего кэша он считается по БД.
+VIEW_BUDGETS = {
+    'index': Budget(queries=5, ms=300),
+    'group_posts': Budget(queries=6, ms=300),
+    'profile': Budget(queries=7, ms=300),
+    'post': Budget(queries=6, ms=300),
+    'post_comments': Budget(queries=5, ms=300),
+    # COUNT и по запросу с LIMIT на каждый источник ленты
+    'follow_index': Budget(queries=5, ms=300),
+    'search': Budget(queries=5, ms=300),
+    'groups': Budget(queries=6, ms=300),
+    'api:index': Budget(queries=4, ms=300),
+    'api:post': Budget(queries=6, ms=300),
+}
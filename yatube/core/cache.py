@@ -0,0 +1,301 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    # Итоги ведут триггеры, чтобы проверка лимитов не делала COUNT(*)
+    '''CREATE TABLE IF NOT EXISTS cache_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    )''',
+    'INSERT OR IGNORE INTO cache_totals VALUES (1, 0, 0)',
+    '''CREATE TRIGGER IF NOT EXISTS cache_totals_insert
+        AFTER INSERT ON cache BEGIN
+            UPDATE cache_totals SET entries = entries + 1,
+                                    size = size + NEW.size;
+        END''',
+    '''CREATE TRIGGER IF NOT EXISTS cache_totals_delete
+        AFTER DELETE ON cache BEGIN
+            UPDATE cache_totals SET entries = entries - 1,
+                                    size = size - OLD.size;
+        END''',
+    '''CREATE TRIGGER IF NOT EXISTS cache_totals_update
+        AFTER UPDATE OF size ON cache BEGIN
+            UPDATE cache_totals SET size = size - OLD.size + NEW.size;
+        END''',
+)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в файле SQLite в режиме WAL, общий для всех процессов хоста.
+
+    Чтения не блокируют друг друга и запись, поэтому воркеры gunicorn
+    видят одни и те же записи без memcached и Redis. Размер ограничен
+    числом записей (MAX_ENTRIES) и суммарным объёмом значений
+    (MAX_SIZE, байт); при превышении вытесняются давно не читанные.
+    Целые числа в пределах 64 бит хранятся как INTEGER, без pickle.
+
+    Опции:
+        MAX_ENTRIES, CULL_FREQUENCY — как у встроенных бэкендов;
+        MAX_SIZE — предел объёма значений, по умолчанию 64 МБ;
+        TOUCH_INTERVAL — как часто (в секундах) обновлять время
+        последнего чтения записи для LRU, по умолчанию 10.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._touch_interval = float(options.get('TOUCH_INTERVAL', 10))
+        self._local = threading.local()
+
+    # соединения
+
+    def _connection(self):
+        """
+        Своё соединение на поток; после fork процесс открывает новое.
+        """
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self._path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self._path, timeout=5,
+                                 isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            with self._write(db):
+                for statement in SCHEMA:
+                    db.execute(statement)
+            local.db, local.pid = db, os.getpid()
+        return local.db
+
+    @staticmethod
+    @contextmanager
+    def _write(db):
+        # IMMEDIATE сразу берёт блокировку записи: читать-менять-писать
+        # внутри такой транзакции атомарно для всех процессов
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    # сериализация
+
+    @staticmethod
+    def _encode(value):
+        # INTEGER в SQLite — знаковое 64-битное, большее уходит в pickle
+        if type(value) is int and INT64_MIN <= value <= INT64_MAX:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    @staticmethod
+    def _size(value):
+        return len(value) if isinstance(value, bytes) else 8
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    # чтение
+
+    def _touch_stale(self, db, keys, now):
+        db.execute(
+            'UPDATE cache SET accessed = ? WHERE accessed < ? AND key IN '
+            f'({",".join("?" * len(keys))})',
+            [now, now - self._touch_interval, *keys],
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        db = self._connection()
+        now = time.time()
+        row = db.execute(
+            'SELECT value, accessed FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        value, accessed = row
+        if accessed < now - self._touch_interval:
+            self._touch_stale(db, [key], now)
+        return self._decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        db = self._connection()
+        now = time.time()
+        rows = db.execute(
+            'SELECT key, value, accessed FROM cache WHERE key IN '
+            f'({",".join("?" * len(keys))}) '
+            'AND (expires IS NULL OR expires > ?)',
+            [*keys, now],
+        ).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - self._touch_interval]
+        if stale:
+            self._touch_stale(db, stale, now)
+        return {keys[key]: self._decode(value) for key, value, _ in rows}
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    # запись
+
+    def _store(self, db, key, value, timeout, now, only_missing=False):
+        value = self._encode(value)
+        sql = (
+            'INSERT INTO cache (key, value, expires, accessed, size) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed, size = excluded.size'
+        )
+        params = [key, value, self.get_backend_timeout(timeout), now,
+                  self._size(value)]
+        if only_missing:
+            sql += ' WHERE cache.expires IS NOT NULL AND cache.expires <= ?'
+            params.append(now)
+        return db.execute(sql, params).rowcount
+
+    def _cull(self, db, now):
+        entries, size = db.execute(
+            'SELECT entries, size FROM cache_totals'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        entries, size = db.execute(
+            'SELECT entries, size FROM cache_totals'
+        ).fetchone()
+        if self._cull_frequency == 0:
+            if entries > self._max_entries or size > self._max_size:
+                db.execute('DELETE FROM cache')
+            return
+        while entries > self._max_entries or size > self._max_size:
+            # как у встроенных бэкендов: удаляем 1/CULL_FREQUENCY
+            # записей, но начиная с самых давно читанных
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)',
+                (max(1, entries // self._cull_frequency),),
+            )
+            entries, size = db.execute(
+                'SELECT entries, size FROM cache_totals'
+            ).fetchone()
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        db = self._connection()
+        now = time.time()
+        with self._write(db):
+            self._store(db, key, value, timeout, now)
+            self._cull(db, now)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        db = self._connection()
+        now = time.time()
+        with self._write(db):
+            added = self._store(db, key, value, timeout, now,
+                                only_missing=True)
+            if added:
+                self._cull(db, now)
+        return bool(added)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        db = self._connection()
+        now = time.time()
+        with self._write(db):
+            for key, value in data.items():
+                self._store(db, self._key(key, version), value, timeout, now)
+            self._cull(db, now)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        return bool(self._connection().execute(
+            'UPDATE cache SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, now),
+        ).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._connection()
+        now = time.time()
+        with self._write(db):
+            row = db.execute(
+                'SELECT value FROM cache '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            # запись заблокирована транзакцией: считаем в Python, чтобы
+            # переполнение 64 бит ушло в pickle, а не в REAL
+            value = self._decode(row[0]) + delta
+            encoded = self._encode(value)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ?, accessed = ? '
+                'WHERE key = ?',
+                (encoded, self._size(encoded), now, key),
+            )
+            return value
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._connection().execute('DELETE FROM cache WHERE key = ?',
+                                   (key,))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._connection().execute(
+                'DELETE FROM cache WHERE key IN '
+                f'({",".join("?" * len(keys))})',
+                keys,
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение живёт весь поток: повторное открытие дороже запроса
+        pass
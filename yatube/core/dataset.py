@@ -0,0 +1,121 @@
+import io
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from posts import rollups, timeline
+from posts.counters import reconcile
+from posts.importer import explicit_dates
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+# Посты распределены по году до DATES_END: лентам, курсорам и индексам
+# по дате нужен разброс, а не одна метка «сейчас»
+DATES_END = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DATES_SPAN = timedelta(days=365)
+
+
+def _image(rnd, number):
+    buffer = io.BytesIO()
+    color = tuple(rnd.randrange(256) for _ in range(3))
+    Image.new('RGB', (1600, 1200), color).save(buffer, 'JPEG', quality=90)
+    return default_storage.save(f'posts/bench_{number}.jpg',
+                                ContentFile(buffer.getvalue()))
+
+
+def generate(users=50, groups=5, posts=1000, comments=2000, follows=500,
+             images=20, seed=42):
+    """
+    Создаёт воспроизводимый синтетический набор данных.
+    Популярность авторов распределена по степенному закону:
+    на немногих авторов приходится большая часть постов и подписок.
+    Даты постов и комментариев тоже выводятся из seed.
+    """
+    rnd = random.Random(seed)
+    User.objects.bulk_create(
+        [User(username=f'bench_user_{n}') for n in range(users)],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith='bench_user_')
+        .order_by('id').values_list('id', flat=True)
+    )
+    weights = [rnd.paretovariate(1.16) for _ in user_ids]
+
+    Group.objects.bulk_create(
+        [
+            Group(title=f'Группа {n}', slug=f'bench-group-{n}',
+                  description=f'Описание группы {n}')
+            for n in range(groups)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    group_ids = list(
+        Group.objects.filter(slug__startswith='bench-group-')
+        .values_list('id', flat=True)
+    )
+
+    image_names = [_image(rnd, n) for n in range(images)]
+    words = ('лето', 'кошка', 'город', 'дождь', 'книга', 'море', 'друг',
+             'утро', 'дорога', 'песня', 'снег', 'чай')
+    with explicit_dates(Post._meta.get_field('pub_date')):
+        Post.objects.bulk_create(
+            [
+                Post(
+                    text=' '.join(rnd.choices(words, k=rnd.randint(5, 60))),
+                    author_id=rnd.choices(user_ids, weights)[0],
+                    group_id=rnd.choice(group_ids + [None]),
+                    image=image_names[n] if n < len(image_names) else None,
+                    pub_date=DATES_END - rnd.random() * DATES_SPAN,
+                )
+                for n in range(posts)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    post_dates = list(
+        Post.objects.order_by('id').values_list('id', 'pub_date')
+    )
+
+    comment_rows = []
+    for _ in range(comments if post_dates else 0):
+        post_id, pub_date = rnd.choice(post_dates)
+        comment_rows.append(Comment(
+            text=' '.join(rnd.choices(words, k=rnd.randint(3, 20))),
+            post_id=post_id,
+            author_id=rnd.choice(user_ids),
+            created=pub_date + rnd.random() * timedelta(days=7),
+        ))
+    with explicit_dates(Comment._meta.get_field('created')):
+        Comment.objects.bulk_create(comment_rows, batch_size=BATCH_SIZE)
+
+    pairs = set()
+    for _ in range(follows):
+        user_id = rnd.choice(user_ids)
+        author_id = rnd.choices(user_ids, weights)[0]
+        if user_id != author_id:
+            pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user, author_id=author) for user, author in pairs],
+        batch_size=BATCH_SIZE,
+    )
+
+    # bulk_create не вызывает сигналы: пересчитываем производные данные
+    reconcile()
+    timeline.rebuild()
+    rollups.rebuild()
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': len(post_dates),
+        'comments': len(comment_rows),
+        'follows': len(pairs),
+        'images': len(image_names),
+        'seed': seed,
+    }
@@ -0,0 +1,290 @@
+"""
+Асинхронный шлюз чтения лент.
+
+ASGI-приложение без Django-обработчика: одно событийное кольцо
+обслуживает главную ленту, ленты групп и авторов и страницу поста
+(HTML и JSON, как /api/v1/). SQL строится теми же querysets, что и
+в posts, и выполняется через aiosqlite на соединениях только для
+чтения. Всё, что пишет в базу, остаётся за WSGI-приложением.
+"""
+import asyncio
+import json
+import logging
+import re
+from urllib.parse import parse_qs
+from urllib.request import pathname2url
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.api import (API_MAX_AGE, COMMENT_FIELDS, POST_FIELDS,
+                       page_payload, serialize_comment, serialize_post)
+from posts.models import Comment, Group, Post
+from posts.pagination import (COMMENTS_PER_PAGE, POSTS_PER_PAGE,
+                              CursorPaginator)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+API_PREFIX = '/api/v1'
+DATETIME_COLUMNS = {'pub_date', 'created'}
+# SQLite-бэкенд Django подставляет ? вместо %s в своей обёртке курсора
+PLACEHOLDER = re.compile(r'(?<!%)%s')
+
+ROUTES = [
+    (re.compile(r'^/$'), 'index'),
+    (re.compile(r'^/group/(?P<slug>[-\w]+)/$'), 'group_posts'),
+    (re.compile(r'^/(?P<username>[^/]+)/$'), 'profile'),
+    (re.compile(r'^/(?P<username>[^/]+)/(?P<post_id>\d+)/$'), 'post'),
+]
+
+
+class NotFound(Exception):
+    pass
+
+
+def database_uri(settings_dict):
+    """
+    URI базы для aiosqlite: тестовая база в памяти уже задана URI,
+    файл открываем только для чтения.
+    """
+    if settings_dict['ENGINE'] != 'django.db.backends.sqlite3':
+        raise ImproperlyConfigured('The feed gateway requires SQLite.')
+    name = str(settings_dict['NAME'])
+    if name.startswith('file:'):
+        return name
+    return f'file:{pathname2url(name)}?mode=ro'
+
+
+def compile_queryset(queryset):
+    """SQL, параметры и имена колонок для queryset из values()."""
+    query = queryset.query
+    sql, params = query.sql_with_params()
+    columns = (list(query.extra_select) + list(query.values_select)
+               + list(query.annotation_select))
+    return PLACEHOLDER.sub('?', sql).replace('%%', '%'), params, columns
+
+
+def convert_row(columns, row):
+    values = dict(zip(columns, row))
+    for name in DATETIME_COLUMNS.intersection(values):
+        value = values[name]
+        if isinstance(value, str):
+            value = parse_datetime(value)
+            if settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.utc)
+            values[name] = value
+    return values
+
+
+class Database:
+    """
+    Пул соединений aiosqlite. Запросы разных клиентов идут
+    параллельно, пока хватает соединений, и не блокируют кольцо.
+    """
+
+    def __init__(self, uri, size):
+        self.uri = uri
+        self.size = size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, alias='default'):
+        return cls(database_uri(connections[alias].settings_dict),
+                   getattr(settings, 'GATEWAY_DB_CONNECTIONS', 4))
+
+    async def open(self):
+        async with self._lock:
+            if self._pool is not None:
+                return
+            import aiosqlite
+
+            pool = asyncio.Queue()
+            for _ in range(self.size):
+                db = await aiosqlite.connect(self.uri, uri=True)
+                await db.execute('PRAGMA query_only = ON')
+                pool.put_nowait(db)
+            self._pool = pool
+
+    async def close(self):
+        async with self._lock:
+            if self._pool is None:
+                return
+            while not self._pool.empty():
+                await self._pool.get_nowait().close()
+            self._pool = None
+
+    async def fetch(self, queryset):
+        await self.open()
+        sql, params, columns = compile_queryset(queryset)
+        db = await self._pool.get()
+        try:
+            async with db.execute(sql, params) as cursor:
+                rows = await cursor.fetchall()
+        finally:
+            self._pool.put_nowait(db)
+        return [convert_row(columns, row) for row in rows]
+
+    async def fetch_one(self, queryset):
+        rows = await self.fetch(queryset[:1])
+        if not rows:
+            raise NotFound
+        return rows[0]
+
+
+class FeedGateway:
+    def __init__(self, database=None):
+        self.database = database or Database.from_settings()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.database.open()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.database.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, send):
+        method = scope['method']
+        path = scope['path']
+        as_json = path.startswith(API_PREFIX + '/')
+        if as_json:
+            path = path[len(API_PREFIX):]
+        if method not in ('GET', 'HEAD'):
+            return await self.respond(send, method, 405, as_json,
+                                      {'detail': 'Только чтение.'},
+                                      [(b'allow', b'GET, HEAD')])
+        query = {
+            key: values[0] for key, values in
+            parse_qs(scope.get('query_string', b'').decode()).items()
+        }
+        for pattern, name in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            return await self.not_found(send, method, as_json)
+
+        try:
+            payload, context = await getattr(self, name)(
+                query, **match.groupdict()
+            )
+        except NotFound:
+            return await self.not_found(send, method, as_json)
+        except Exception:
+            logger.exception('Gateway failed on %s', scope['path'])
+            return await self.respond(send, method, 500, as_json,
+                                      {'detail': 'Ошибка сервера.'})
+        if not as_json:
+            context['payload'] = payload
+            payload = render_to_string(context.pop('template'), context)
+        await self.respond(send, method, 200, as_json, payload, [
+            (b'cache-control', f'public, max-age={API_MAX_AGE}'.encode()),
+        ])
+
+    async def not_found(self, send, method, as_json):
+        await self.respond(send, method, 404, as_json,
+                           {'detail': 'Не найдено.'})
+
+    async def respond(self, send, method, status, as_json, payload,
+                      headers=()):
+        if as_json:
+            body = json.dumps(payload, cls=DjangoJSONEncoder,
+                              ensure_ascii=False).encode()
+            content_type = b'application/json'
+        else:
+            if isinstance(payload, dict):
+                payload = payload['detail']
+            body = payload.encode()
+            content_type = b'text/html; charset=utf-8'
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', content_type),
+                (b'content-length', str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({'type': 'http.response.body',
+                    'body': b'' if method == 'HEAD' else body})
+
+    async def cursor_page(self, paginator, after=None, before=None):
+        queryset, direction = paginator.page_query(after, before)
+        page = paginator.make_page(await self.database.fetch(queryset),
+                                   direction)
+        if page is None:
+            return await self.cursor_page(paginator)
+        return page
+
+    async def feed(self, queryset, query):
+        paginator = CursorPaginator(queryset.values(*POST_FIELDS),
+                                    POSTS_PER_PAGE)
+        page = await self.cursor_page(paginator, query.get('after'),
+                                      query.get('before'))
+        return page_payload(page, serialize_post)
+
+    async def index(self, query):
+        payload = await self.feed(Post.objects.for_feed(), query)
+        return payload, {'template': 'gateway/feed.html',
+                         'title': 'Последние обновления на сайте'}
+
+    async def group_posts(self, query, slug):
+        group = await self.database.fetch_one(
+            Group.objects.filter(slug=slug).values('id', 'title',
+                                                   'description')
+        )
+        payload = await self.feed(
+            Post.objects.for_feed().filter(group_id=group['id']), query
+        )
+        return payload, {'template': 'gateway/feed.html',
+                         'title': group['title'],
+                         'description': group['description']}
+
+    async def profile(self, query, username):
+        author = await self.database.fetch_one(
+            User.objects.filter(username=username).values(
+                'id', 'username', 'first_name', 'last_name'
+            )
+        )
+        payload = await self.feed(
+            Post.objects.for_feed().filter(author_id=author['id']), query
+        )
+        title = ' '.join(filter(None, (author['first_name'],
+                                       author['last_name'])))
+        return payload, {'template': 'gateway/feed.html',
+                         'title': title or author['username']}
+
+    async def post(self, query, username, post_id):
+        row = await self.database.fetch_one(
+            Post.objects.for_feed().filter(
+                id=post_id, author__username=username
+            ).values(*POST_FIELDS)
+        )
+        paginator = CursorPaginator(
+            Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+            COMMENTS_PER_PAGE, ordering=('created', 'id'),
+        )
+        page = await self.cursor_page(paginator, query.get('after'),
+                                      query.get('before'))
+        payload = serialize_post(row)
+        payload['comments'] = page_payload(page, serialize_comment)
+        return payload, {'template': 'gateway/post.html',
+                         'title': row['author__username']}
@@ -0,0 +1,182 @@
+import json
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import (CaptureQueriesContext, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+from django.urls import URLResolver, get_resolver, reverse
+
+from core import dataset
+from core.budgets import VIEW_BUDGETS
+from posts.models import Group
+
+User = get_user_model()
+
+# Маршруты из этих URLconf обходятся бенчмарком
+BENCH_URLCONFS = ('posts.urls', 'posts.api_urls', 'about.urls',
+                  'users.urls')
+
+# Разрушающие, меняющие данные или требующие POST маршруты не вызываются:
+# подписка по GET сдвигала бы ленты и счётчики между прогонами
+SKIP_ROUTES = {'post_delete', 'add_comment', 'profile_follow',
+               'profile_unfollow'}
+
+EXTRA_QUERY = {'search': {'q': 'кошка'}}
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       round(share * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def iter_routes(resolver=None, namespace=''):
+    """
+    Имена маршрутов и имена их параметров из BENCH_URLCONFS.
+    """
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            urlconf = getattr(pattern.urlconf_name, '__name__',
+                              pattern.urlconf_name)
+            if urlconf not in BENCH_URLCONFS:
+                continue
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f'{namespace}{pattern.namespace}:'
+            yield from iter_routes(pattern, prefix)
+        elif pattern.name:
+            yield (f'{namespace}{pattern.name}',
+                   list(pattern.pattern.converters))
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетический набор данных во временной базе '
+            'и измеряет время ответа, число запросов и размер страниц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--requests', type=int, default=30,
+                            help='число измерений на маршрут')
+        parser.add_argument('--cold', action='store_true',
+                            help='очищать кэш перед каждым запросом')
+        parser.add_argument('--output', help='файл для JSON-отчёта')
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='yatube-bench-')
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                cache.clear()
+                report = {
+                    'dataset': dataset.generate(
+                        users=options['users'],
+                        groups=options['groups'],
+                        posts=options['posts'],
+                        comments=options['comments'],
+                        follows=options['follows'],
+                        images=options['images'],
+                        seed=options['seed'],
+                    ),
+                }
+                report['routes'] = self.run_routes(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def sample_kwargs(self):
+        author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        post = author.posts.annotate(
+            total=Count('comments')
+        ).order_by('-total').first()
+        group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        return author, {
+            'username': author.username,
+            'post_id': post.id if post else 0,
+            'slug': group.slug if group else 'missing',
+        }
+
+    def run_routes(self, options):
+        author, kwargs = self.sample_kwargs()
+        reader = User.objects.exclude(pk=author.pk).annotate(
+            total=Count('follower')
+        ).order_by('-total').first() or author
+        client = Client()
+        client.force_login(author)
+        reader_client = Client()
+        reader_client.force_login(reader)
+
+        results = {}
+        for name, params in iter_routes():
+            if name.split(':')[-1] in SKIP_ROUTES:
+                continue
+            url = reverse(name, kwargs={key: kwargs[key] for key in params})
+            # подписываться на себя нельзя, поэтому ленту и подписки
+            # измеряем от имени читателя
+            user_client = (reader_client if name.split(':')[-1] in (
+                'follow_index', 'profile_follow', 'profile_unfollow'
+            ) else client)
+            results[name] = self.measure(
+                user_client, url, EXTRA_QUERY.get(name, {}), options
+            )
+            budget = VIEW_BUDGETS.get(name)
+            if budget is not None:
+                results[name]['budget'] = budget._asdict()
+                results[name]['over_budget'] = (
+                    results[name]['queries'] > budget.queries
+                    or results[name]['p95_ms'] > budget.ms
+                )
+        return results
+
+    def measure(self, client, url, query, options):
+        client.get(url, query)
+        timings, queries = [], []
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url, query)
+                if response.streaming:
+                    content = b''.join(response.streaming_content)
+                else:
+                    content = response.content
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': max(queries),
+            'bytes': len(content),
+        }
@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+BACKENDS = ('locmem', 'filebased', 'sqlite')
+
+
+def make_cache(name, directory):
+    params = {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    if name == 'locmem':
+        return LocMemCache(f'cachebench-{directory}', params)
+    if name == 'filebased':
+        return FileBasedCache(os.path.join(directory, 'files'), params)
+    return SQLiteCache(os.path.join(directory, 'cache.sqlite3'), params)
+
+
+def rate(count, started):
+    return round(count / (time.perf_counter() - started))
+
+
+def single_process(cache, ops, value):
+    """Операций в секунду для основных вызовов в одном процессе."""
+    keys = [f'key:{i}' for i in range(ops)]
+    results = {}
+
+    started = time.perf_counter()
+    for key in keys:
+        cache.set(key, value)
+    results['set'] = rate(ops, started)
+
+    started = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    results['get'] = rate(ops, started)
+
+    started = time.perf_counter()
+    for i in range(0, ops, 10):
+        cache.get_many(keys[i:i + 10])
+    results['get_many_10'] = rate(ops, started)
+
+    cache.set('counter', 0)
+    started = time.perf_counter()
+    for _ in range(ops):
+        cache.incr('counter')
+    results['incr'] = rate(ops, started)
+    return results
+
+
+def shared_worker(name, directory, keys, ops, value, queue):
+    cache = make_cache(name, directory)
+    hits = 0
+    for i in range(ops):
+        key = f'page:{i % keys}'
+        if cache.get(key) is None:
+            cache.set(key, value)
+        else:
+            hits += 1
+    queue.put(hits)
+
+
+def shared_hit_rate(name, directory, workers, keys, ops, value):
+    """
+    Доля попаданий, когда несколько воркеров читают одни и те же
+    страницы: у кэша в памяти процесса каждый прогревает свою копию.
+    """
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [
+        context.Process(target=shared_worker,
+                        args=(name, directory, keys, ops, value, queue))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    hits = sum(queue.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return round(hits / (workers * ops), 3)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает SQLiteCache с LocMemCache и FileBasedCache: '
+            'скорость операций и общую долю попаданий у воркеров.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=5000)
+        parser.add_argument('--value-size', type=int, default=2048)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--keys', type=int, default=1000,
+                            help='число разных страниц для воркеров')
+        parser.add_argument('--backend', action='append', choices=BACKENDS,
+                            help='по умолчанию все')
+        parser.add_argument('--output', help='файл для JSON-отчёта')
+
+    def handle(self, *args, **options):
+        value = os.urandom(options['value_size'])
+        report = {}
+        for name in options['backend'] or BACKENDS:
+            directory = tempfile.mkdtemp(prefix='yatube-cachebench-')
+            try:
+                report[name] = single_process(
+                    make_cache(name, directory), options['ops'], value
+                )
+                directory_shared = os.path.join(directory, 'shared')
+                report[name]['shared_hit_rate'] = shared_hit_rate(
+                    name, directory_shared, options['workers'],
+                    options['keys'], options['ops'], value,
+                )
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
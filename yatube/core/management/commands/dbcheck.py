@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.db import read_pragmas
+
+# PRAGMA возвращает режимы числами или в нижнем регистре
+NORMALIZED = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+}
+
+
+def normalize(name, value):
+    if isinstance(value, str):
+        value = NORMALIZED.get(name, {}).get(value.upper(), value.lower())
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Показывает активные настройки соединения с базой данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true',
+                            help='завершиться с ошибкой при расхождениях')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'profile: {settings.DATABASE_PROFILE}')
+        self.stdout.write(f'vendor: {connection.vendor}')
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f'CONN_MAX_AGE: {max_age}')
+        if connection.vendor != 'sqlite':
+            return
+
+        expected = getattr(settings, 'SQLITE_PRAGMAS', {})
+        names = ['journal_mode', 'synchronous', 'mmap_size', 'cache_size',
+                 'busy_timeout', 'temp_store']
+        names += [name for name in expected if name not in names]
+        mismatches = []
+        for name, value in read_pragmas(connection, names).items():
+            line = f'{name}: {value}'
+            if name in expected:
+                if normalize(name, value) == normalize(name, expected[name]):
+                    line += ' (ok)'
+                else:
+                    line += f' (expected {expected[name]})'
+                    mismatches.append(name)
+            self.stdout.write(line)
+        if mismatches and options['strict']:
+            raise CommandError(
+                'Настройки не применены: ' + ', '.join(mismatches)
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = ('Компилирует шаблоны и заполняет таблицы URL; '
+            'показывает, сколько это стоит холодному процессу.')
+
+    def handle(self, *args, **options):
+        result = warm_up()
+        self.stdout.write(f"templates: {result['templates']}")
+        self.stdout.write(f"url names: {result['url_names']}")
+        self.stdout.write(f"follows: {result['follows']}")
+        self.stdout.write(f"time: {result['ms']} ms")
+        if result['failed']:
+            raise CommandError(
+                'Не компилируются: ' + ', '.join(result['failed'])
+            )
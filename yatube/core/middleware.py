@@ -0,0 +1,177 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import base
+
+logger = logging.getLogger('yatube.timing')
+
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+_MISSING = object()
+_installed = False
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth',
+                 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def _install():
+    """
+    Один раз на процесс оборачивает рендер шаблонов и чтение кэша.
+    Вне замеряемого запроса обёртки сводятся к чтению contextvar.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    _install_template_timing()
+    _install_cache_counting()
+
+
+def _install_template_timing():
+    render = base.Template.render
+
+    def timed_render(self, context):
+        metrics = _metrics.get()
+        if metrics is None:
+            return render(self, context)
+        # вложенные include не считаем повторно
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - start
+
+    base.Template.render = timed_render
+
+
+def _install_cache_counting():
+    cache_class = type(caches['default'])
+    get, get_many = cache_class.get, cache_class.get_many
+
+    def counted_get(self, key, default=None, version=None):
+        metrics = _metrics.get()
+        if metrics is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+
+    def counted_get_many(self, keys, version=None):
+        metrics = _metrics.get()
+        values = get_many(self, keys, version)
+        if metrics is not None:
+            keys = list(keys)
+            metrics.cache_hits += len(values)
+            metrics.cache_misses += len(keys) - len(values)
+        return values
+
+    cache_class.get = counted_get
+    # базовый get_many сам вызывает get, повторно считать не нужно
+    if get_many is not BaseCache.get_many:
+        cache_class.get_many = counted_get_many
+
+
+def server_timing(total, metrics):
+    return ', '.join([
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={metrics.db_time * 1000:.1f};'
+        f'desc="{metrics.queries} queries"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'cache;desc="{metrics.cache_hits} hits '
+        f'{metrics.cache_misses} misses"',
+    ])
+
+
+class TimingMiddleware:
+    """
+    Лёгкий замер запроса: общее время, число и время SQL-запросов,
+    время рендера шаблонов и попадания в кэш. Результат — строка
+    в логгере yatube.timing и заголовок Server-Timing. Доля замеряемых
+    запросов задаётся TIMING_SAMPLE_RATE; запросы с INTERNAL_IPS
+    замеряются всегда.
+
+    Заголовок раскрывает устройство сайта, поэтому выставляется только
+    для INTERNAL_IPS и сотрудников (is_staff). Middleware стоит первым,
+    пользователь известен лишь после ответа: сотрудник вне INTERNAL_IPS
+    видит заголовок на попавших в выборку запросах.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'TIMING_SAMPLE_RATE', 0.01)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        _install()
+
+    def __call__(self, request):
+        internal = request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        if (not internal and self.sample_rate < 1
+                and random.random() >= self.sample_rate):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_count_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        total = time.perf_counter() - start
+
+        user = getattr(request, 'user', None)
+        if internal or (user is not None and user.is_staff):
+            response['Server-Timing'] = server_timing(total, metrics)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'db_queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'template_ms': round(metrics.template_time * 1000, 2),
+                'cache_hits': metrics.cache_hits,
+                'cache_misses': metrics.cache_misses,
+            }))
+        return response
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'TIMEOUT': 60, 'OPTIONS': options})
+
+
+def increment(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('key', {'value': [1, 2]})
+        self.assertEqual(cache.get('key'), {'value': [1, 2]})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        cache.set_many({'a': 1, 'b': 'two'})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 'two'})
+        cache.delete_many(['a', 'b'])
+        self.assertFalse(cache.has_key('a'))
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        cache.clear()
+        self.assertIsNone(cache.get('new'))
+
+    def test_big_integers(self):
+        """Целые за пределами 64 бит хранятся и растут без ошибок."""
+        cache = self.cache
+        cache.set('big', 2 ** 70)
+        self.assertEqual(cache.get('big'), 2 ** 70)
+        cache.set('edge', 2 ** 63 - 1)
+        self.assertEqual(cache.incr('edge'), 2 ** 63)
+        self.assertEqual(cache.get('edge'), 2 ** 63)
+        self.assertEqual(cache.incr('edge', -1), 2 ** 63 - 1)
+        self.assertEqual(cache.incr('big', 2 ** 70), 2 ** 71)
+
+    def test_expiry(self):
+        cache = self.cache
+        cache.set('short', 'value', timeout=1)
+        cache.set('forever', 'value', timeout=None)
+        time.sleep(1.1)
+        self.assertIsNone(cache.get('short'))
+        self.assertTrue(cache.add('short', 'again'))
+        self.assertEqual(cache.get('forever'), 'value')
+        self.assertTrue(cache.touch('forever', 1))
+        self.assertFalse(cache.touch('missing', 1))
+
+    def test_shared_between_instances(self):
+        """Записи одного воркера видны другому."""
+        self.cache.set('key', 'value')
+        self.assertEqual(make_cache(self.path).get('key'), 'value')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=increment, args=(self.path, 50))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+        self.assertEqual(self.cache.decr('counter', 10), 190)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        cache = make_cache(self.path, MAX_ENTRIES=10, CULL_FREQUENCY=2,
+                           TOUCH_INTERVAL=0)
+        cache.set('hot', 'value')
+        for i in range(20):
+            cache.set(f'key{i}', i)
+            cache.get('hot')
+        self.assertEqual(cache.get('hot'), 'value')
+        self.assertIsNone(cache.get('key0'))
+        self.assertLessEqual(
+            len(cache.get_many([f'key{i}' for i in range(20)])), 10
+        )
+
+    def test_size_eviction(self):
+        cache = make_cache(self.path, MAX_SIZE=10_000, TOUCH_INTERVAL=0)
+        for i in range(10):
+            cache.set(f'blob{i}', b'x' * 3000)
+        stored = cache.get_many([f'blob{i}' for i in range(10)])
+        self.assertLessEqual(len(stored), 3)
+        self.assertIn('blob9', stored)
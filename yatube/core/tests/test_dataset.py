@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import Comment, Group, Post
+
+from .. import dataset
+
+User = get_user_model()
+
+SMALL = {'users': 5, 'groups': 2, 'posts': 30, 'comments': 20,
+         'follows': 5, 'images': 0}
+
+
+class GenerateTest(TestCase):
+    def dates(self):
+        return (list(Post.objects.order_by('id').values_list('pub_date',
+                                                             flat=True)),
+                list(Comment.objects.order_by('id').values_list('created',
+                                                                flat=True)))
+
+    def test_dates_spread_from_seed(self):
+        """Даты постов разнесены по году и повторяются при том же seed;
+        комментарий не старше своего поста.
+        """
+        dataset.generate(**SMALL)
+        pub_dates, created = self.dates()
+        self.assertGreater(max(pub_dates) - min(pub_dates),
+                           timedelta(days=30))
+        self.assertLessEqual(max(pub_dates), dataset.DATES_END)
+        for comment in Comment.objects.select_related('post'):
+            self.assertGreaterEqual(comment.created, comment.post.pub_date)
+
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        dataset.generate(**SMALL)
+        self.assertEqual(self.dates(), (pub_dates, created))
@@ -0,0 +1,25 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..db import apply_sqlite_pragmas, read_pragmas
+
+
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096,
+                                       'busy_timeout': 1234})
+    def test_pragmas_applied_and_reported(self):
+        """PRAGMA из настроек применяются к соединению,
+        команда dbcheck их показывает.
+        """
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertEqual(
+            read_pragmas(connection, ['cache_size', 'busy_timeout']),
+            {'cache_size': -4096, 'busy_timeout': 1234}
+        )
+        out = StringIO()
+        call_command('dbcheck', strict=True, stdout=out)
+        self.assertIn('cache_size: -4096 (ok)', out.getvalue())
+        self.assertIn('busy_timeout: 1234 (ok)', out.getvalue())
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TransactionTestCase
+
+from posts.models import Comment, Group, Post
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+User = get_user_model()
+
+
+def call(app, path, method='GET', query=b''):
+    """Один HTTP-запрос к ASGI-приложению."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        try:
+            await app({'type': 'http', 'method': method, 'path': path,
+                       'query_string': query, 'headers': []},
+                      receive, send)
+        finally:
+            await app.database.close()
+
+    asyncio.run(run())
+    start, body = messages
+    return start['status'], dict(start['headers']), body['body']
+
+
+@skipUnless(aiosqlite, 'нужен aiosqlite')
+@skipUnless(connection.vendor == 'sqlite', 'шлюз работает только с SQLite')
+class FeedGatewayTest(TransactionTestCase):
+    def setUp(self):
+        from ..gateway import FeedGateway
+
+        cache.clear()
+        self.app = FeedGateway()
+        self.user = User.objects.create(username='test_user')
+        self.group = Group.objects.create(title='Test group', slug='test')
+        for i in range(12):
+            post = Post.objects.create(text=f'text {i}', author=self.user,
+                                       group=self.group)
+        Comment.objects.create(text='comment', post=post, author=self.user)
+        self.post = post
+
+    def test_json_matches_api(self):
+        """JSON шлюза совпадает с ответами /api/v1/ Django-приложения."""
+        client = Client()
+        paths = [
+            '/api/v1/',
+            f'/api/v1/group/{self.group.slug}/',
+            f'/api/v1/{self.user.username}/',
+            f'/api/v1/{self.user.username}/{self.post.id}/',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                status, headers, body = call(self.app, path)
+                self.assertEqual(status, 200)
+                self.assertEqual(headers[b'content-type'],
+                                 b'application/json')
+                self.assertEqual(json.loads(body),
+                                 json.loads(client.get(path).content))
+
+    def test_cursor_pagination(self):
+        _, _, body = call(self.app, '/api/v1/')
+        cursor = json.loads(body)['next']
+        _, _, body = call(self.app, '/api/v1/',
+                          query=f'after={cursor}'.encode())
+        self.assertEqual(
+            [post['text'] for post in json.loads(body)['results']],
+            ['text 1', 'text 0']
+        )
+
+    def test_html_pages(self):
+        status, headers, body = call(self.app, '/')
+        self.assertEqual(status, 200)
+        self.assertIn(b'text/html', headers[b'content-type'])
+        self.assertIn('text 11', body.decode())
+        status, _, body = call(
+            self.app, f'/{self.user.username}/{self.post.id}/'
+        )
+        self.assertIn('comment', body.decode())
+
+    def test_not_found_and_read_only(self):
+        self.assertEqual(call(self.app, '/missing/')[0], 404)
+        self.assertEqual(call(self.app, '/group/missing/')[0], 404)
+        self.assertEqual(call(self.app, '/', method='POST')[0], 405)
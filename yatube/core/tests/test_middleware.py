@@ -0,0 +1,76 @@
+import re
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        Post.objects.create(text='test_text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с запросами к БД, шаблонами
+        и кэшем.
+        """
+        response = self.guest_client.get(reverse('index'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'total;dur=\d+\.\d')
+        self.assertRegex(header, r'tpl;dur=\d+\.\d')
+        queries = int(re.search(r'desc="(\d+) queries"', header).group(1))
+        self.assertGreater(queries, 0)
+        misses = int(re.search(r'(\d+) misses', header).group(1))
+        self.assertGreater(misses, 0)
+
+        response = self.guest_client.get(reverse('index'))
+        hits = int(
+            re.search(r'(\d+) hits', response['Server-Timing']).group(1)
+        )
+        self.assertGreater(hits, 0)
+
+    @override_settings(TIMING_SAMPLE_RATE=1)
+    def test_header_only_for_internal_or_staff(self):
+        """Снаружи INTERNAL_IPS заголовок получают только сотрудники."""
+        url = reverse('index')
+        external = {'REMOTE_ADDR': '203.0.113.5'}
+        response = self.guest_client.get(url, **external)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        staff = User.objects.create(username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        response = client.get(url, **external)
+        self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(TIMING_SAMPLE_RATE=0.01)
+    def test_internal_requests_always_measured(self):
+        """Выборка не отбрасывает запросы с INTERNAL_IPS."""
+        with mock.patch('core.middleware.random.random', return_value=0.5):
+            response = self.guest_client.get(reverse('index'))
+            self.assertTrue(response.has_header('Server-Timing'))
+            staff = User.objects.create(username='staff', is_staff=True)
+            client = Client()
+            client.force_login(staff)
+            response = client.get(reverse('index'),
+                                  REMOTE_ADDR='203.0.113.5')
+            self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(TIMING_SAMPLE_RATE=0)
+    def test_disabled_by_sample_rate(self):
+        """При нулевой доле замеров заголовок не выставляется."""
+        response = Client().get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
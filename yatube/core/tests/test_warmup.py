@@ -0,0 +1,66 @@
+import os
+import runpy
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from yatube import settings as settings_module
+
+from ..warmup import warm_templates, warm_up, warm_urls
+
+
+def profile_settings(**environ):
+    """Модуль настроек, выполненный заново с переменными окружения."""
+    with mock.patch.dict(os.environ, environ):
+        return runpy.run_path(settings_module.__file__)
+
+
+CACHED_TEMPLATES = profile_settings(TEMPLATE_PROFILE='production')[
+    'TEMPLATES'
+]
+
+
+class TemplateProfileTest(SimpleTestCase):
+    def test_production_uses_cached_loader(self):
+        """Профиль production включает кэширующий загрузчик и при DEBUG."""
+        options = CACHED_TEMPLATES[0]['OPTIONS']
+        self.assertFalse(CACHED_TEMPLATES[0]['APP_DIRS'])
+        self.assertEqual(options['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+
+    def test_development_reads_from_disk(self):
+        templates = profile_settings(TEMPLATE_PROFILE='development')[
+            'TEMPLATES'
+        ]
+        self.assertTrue(templates[0]['APP_DIRS'])
+        self.assertNotIn('loaders', templates[0]['OPTIONS'])
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class WarmupTest(TestCase):
+    def test_templates_compiled_into_cache(self):
+        """После прогрева шаблоны лежат в кэше загрузчика."""
+        compiled, failed = warm_templates()
+        self.assertEqual(failed, [])
+        for name in ('base.html', 'post_item.html', 'paginator.html',
+                     'posts/index.html'):
+            self.assertIn(name, compiled)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+
+    def test_url_resolvers_populated(self):
+        self.assertGreater(warm_urls(), 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        self.assertIn('templates:', out.getvalue())
+
+    def test_connections_closed_after_warm_up(self):
+        """Прогрев не оставляет открытых соединений до fork воркеров."""
+        with mock.patch('core.warmup.connections') as connections:
+            warm_up()
+        connections.close_all.assert_called_once_with()
@@ -0,0 +1,84 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+from django.utils import translation
+
+from posts import follow_graph
+
+logger = logging.getLogger(__name__)
+
+
+def iter_template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(('.html', '.txt')):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """
+    Компилирует все шаблоны из каталогов DIRS. С кэширующим
+    загрузчиком они остаются в памяти, и первый запрос пользователя
+    не тратит время на разбор base.html и включаемых в него файлов.
+    """
+    compiled, failed = [], []
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for name in iter_template_names(directory):
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Template %s failed to compile', name)
+                    failed.append(name)
+                else:
+                    compiled.append(name)
+    return compiled, failed
+
+
+def warm_urls():
+    """
+    Заполняет таблицы reverse() корневого резолвера и всех
+    пространств имён, которые иначе строятся на первом {% url %}.
+    """
+    resolvers = [get_resolver()]
+    count = 0
+    while resolvers:
+        resolver = resolvers.pop()
+        count += len(resolver.reverse_dict)
+        resolvers.extend(
+            child for _, child in resolver.namespace_dict.values()
+        )
+    return count
+
+
+def warm_up():
+    """
+    Прогревает процесс перед первым запросом и закрывает соединения
+    с БД, открытые по ходу.
+    """
+    start = time.perf_counter()
+    compiled, failed = warm_templates()
+    patterns = warm_urls()
+    follows = follow_graph.load()
+    # каталог переводов грузится при первой активации языка
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+    # с gunicorn --preload прогрев идёт в мастер-процессе: соединение
+    # SQLite нельзя передавать через fork, воркеры откроют свои
+    connections.close_all()
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info('Warm-up: %d templates, %d url names, %d follows '
+                'in %.1f ms', len(compiled), patterns, follows, elapsed)
+    return {
+        'templates': len(compiled),
+        'failed': failed,
+        'url_names': patterns,
+        'follows': follows,
+        'ms': round(elapsed, 1),
+    }
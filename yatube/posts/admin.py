@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
 from .models import Post, Group
+from .search import match_expression, matching_ids_sql
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -8,6 +12,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if (connection.vendor != 'sqlite'
+                or not match_expression(search_term)):
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        sql, params = matching_ids_sql(search_term)
+        return queryset.filter(id__in=RawSQL(sql, params)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
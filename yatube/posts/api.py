@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .models import Comment, Post
+from .pagination import COMMENTS_PER_PAGE, CursorPaginator, POSTS_PER_PAGE
+from .views import (get_author, get_group, group_etag, index_etag,
+                    post_etag, profile_etag)
+from . import caching, rollups, timeline
+
+# Только то, что нужно клиенту ленты: без экземпляров моделей
+POST_FIELDS = ('id', 'text', 'pub_date', 'image', 'author__username',
+               'group__slug', 'comment_count')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+API_MAX_AGE = getattr(settings, 'POSTS_API_MAX_AGE', 30)
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'comment_count': row['comment_count'],
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def page_payload(page, serialize):
+    return {
+        'results': [serialize(row) for row in page.object_list],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def cursor_payload(request, queryset, serialize, per_page=POSTS_PER_PAGE,
+                   ordering=('-pub_date', '-id')):
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+    page = paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return page_payload(page, serialize)
+
+
+def feed_payload(request, queryset):
+    return cursor_payload(request, queryset.values(*POST_FIELDS),
+                          serialize_post)
+
+
+def cached_feed(request, base, tags, queryset):
+    return JsonResponse(caching.get_or_set(
+        f'{base}-{caching.page_key(request)}',
+        tags,
+        lambda: feed_payload(request, queryset),
+    ))
+
+
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=index_etag)
+@caching.stale_not_stored
+def index(request):
+    return cached_feed(request, 'api-index', [caching.FEED_TAG],
+                       Post.objects.for_feed())
+
+
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=group_etag)
+@caching.stale_not_stored
+def group_posts(request, slug):
+    group = get_group(request, slug)
+    if group is None:
+        raise Http404
+    return cached_feed(request, f'api-group-{group.id}',
+                       [caching.group_tag(group.id)],
+                       group.posts.for_feed())
+
+
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=profile_etag)
+@caching.stale_not_stored
+def profile(request, username):
+    author = get_author(request, username)
+    if author is None:
+        raise Http404
+    return cached_feed(request, f'api-profile-{author.id}',
+                       [caching.author_tag(author.id)],
+                       author.posts.for_feed())
+
+
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=index_etag)
+@caching.stale_not_stored
+def groups(request):
+    """Каталог групп; листается по номеру страницы ?page=."""
+    def compute():
+        page = rollups.directory(request.GET.get('page'))
+        return {
+            'results': page.object_list,
+            'page': page.number,
+            'pages': page.paginator.num_pages,
+        }
+
+    return JsonResponse(caching.get_or_set(
+        f'api-groups-{caching.page_key(request)}', [caching.FEED_TAG], compute
+    ))
+
+
+@require_GET
+@cache_control(private=True, max_age=API_MAX_AGE)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Требуется авторизация.'},
+                            status=401)
+    page = timeline.FollowFeed(
+        request.user, Post.objects.for_feed().values(*POST_FIELDS)
+    ).page(request.GET.get('after'), request.GET.get('before'))
+    return JsonResponse(page_payload(page, serialize_post))
+
+
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=post_etag)
+def post_view(request, username, post_id):
+    """Пост и первая порция комментариев; ?after= листает комментарии."""
+    row = Post.objects.for_feed().filter(
+        id=post_id, author__username=username
+    ).values(*POST_FIELDS).first()
+    if row is None:
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    )
+    payload = serialize_post(row)
+    payload['comments'] = cursor_payload(
+        request, comments, serialize_comment, per_page=COMMENTS_PER_PAGE,
+        ordering=('created', 'id'),
+    )
+    return JsonResponse(payload)
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('follow/', api.follow_index, name='follow_index'),
+    path('groups/', api.groups, name='groups'),
+    path('group/<slug:slug>/', api.group_posts, name='group_posts'),
+    path('<str:username>/', api.profile, name='profile'),
+    path('<str:username>/<int:post_id>/', api.post_view, name='post'),
+    path('', api.index, name='index'),
+]
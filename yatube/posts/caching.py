@@ -0,0 +1,289 @@
+import contextvars
+import functools
+import hashlib
+import math
+import random
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Func, IntegerField
+from django.utils.cache import patch_cache_control
+
+from .models import Comment, GroupStats, Post, UserStats
+
+TAG_KEY_PREFIX = 'posts-tag-version'
+
+# Пересчёт одного значения не дольше LOCK_TIMEOUT секунд; без старой
+# копии остальные ждут его до LOCK_WAIT секунд, потом считают сами.
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+
+_served_stale = contextvars.ContextVar('posts_served_stale', default=False)
+
+FEED_TAG = 'feed'
+
+# Параметры, от которых зависит выдача страницы ленты
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def author_tag(author_id):
+    return f'author:{author_id}'
+
+
+def group_tag(group_id):
+    return f'group:{group_id}'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def follow_tag(user_id):
+    return f'follow:{user_id}'
+
+
+def post_tags(post, group_ids=()):
+    """
+    Теги, которые затрагивает изменение поста: общая лента,
+    лента автора, группы (текущая и прежние) и страница поста.
+    """
+    tags = {FEED_TAG, author_tag(post.author_id), post_tag(post.id)}
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            tags.add(group_tag(group_id))
+    return tags
+
+
+def is_shared():
+    """
+    Общий ли кэш для всех процессов. Иначе версии тегов у каждого
+    воркера свои, и инвалидация доходит только до одного из них.
+    """
+    return getattr(settings, 'POSTS_SHARED_CACHE', False)
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}:{tag}'
+
+
+def tag_version_map(tags):
+    """
+    Текущие версии тегов словарём. Тег без версии получает новую,
+    поэтому потеря ключа в кэше приводит лишь к промаху.
+    """
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, uuid.uuid4().hex[:12], timeout=None)
+        versions[key] = cache.get(key)
+    return {tag: versions[key] for key, tag in keys.items()}
+
+
+def tag_versions(tags):
+    versions = tag_version_map(tags)
+    return [versions[tag] for tag in sorted(tags)]
+
+
+def invalidate(*tags):
+    """
+    Сдвигает версии тегов: все записи, зависящие от них, устаревают.
+    """
+    cache.set_many(
+        {_tag_key(tag): uuid.uuid4().hex[:12] for tag in tags},
+        timeout=None,
+    )
+
+
+def make_key(base, tags):
+    return f'{base}:' + '.'.join(tag_versions(tags))
+
+
+def _store(base, key, compute, timeout):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    cache.set(key, (value, delta, time.time() + timeout), timeout=timeout)
+    # указатель на последнюю версию: её отдают, пока считается новая
+    cache.set(f'{base}:latest', key, timeout=timeout)
+    return value
+
+
+def _acquire(key):
+    token = uuid.uuid4().hex
+    if cache.add(f'{key}:lock', token, timeout=LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _release(key, token):
+    if cache.get(f'{key}:lock') == token:
+        cache.delete(f'{key}:lock')
+
+
+def _refresh(base, key, compute, timeout, token):
+    try:
+        return _store(base, key, compute, timeout)
+    finally:
+        _release(key, token)
+
+
+def _stale(base):
+    latest = cache.get(f'{base}:latest')
+    entry = cache.get(latest) if latest is not None else None
+    if entry is None:
+        return None
+    _served_stale.set(True)
+    return entry
+
+
+def get_or_set(base, tags, compute, timeout=None, beta=1.0):
+    """
+    Возвращает закэшированное значение, зависящее от тегов,
+    вычисляя и сохраняя его при промахе.
+
+    Защищает от лавины пересчётов: значение считает только запрос,
+    взявший блокировку, остальные тем временем получают прежнюю
+    версию. Незадолго до истечения срока значение с вероятностью,
+    растущей к концу срока и со временем вычисления, пересчитывается
+    заранее (XFetch), поэтому запись не истекает у всех разом.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'POSTS_CACHE_TIMEOUT', 60 * 60)
+    key = make_key(base, tags)
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        # -log(U) ~ Exp(1): чем ближе expires, тем вероятнее пересчёт
+        early = delta * beta * -math.log(1.0 - random.random())
+        if time.time() + early < expires:
+            return value
+        token = _acquire(key)
+        if token is None:
+            return value
+        return _refresh(base, key, compute, timeout, token)
+
+    token = _acquire(key)
+    if token is not None:
+        return _refresh(base, key, compute, timeout, token)
+    stale = _stale(base)
+    if stale is not None:
+        return stale[0]
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+def stale_not_stored(view):
+    """
+    Ответ, собранный из прежней версии кэша, браузер не сохраняет:
+    ETag у него уже новый, и по нему клиент получал бы 304
+    на устаревшую страницу.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _served_stale.set(False)
+        try:
+            response = view(request, *args, **kwargs)
+            if _served_stale.get():
+                patch_cache_control(response, no_store=True)
+            return response
+        finally:
+            _served_stale.reset(token)
+    return wrapper
+
+
+def page_key(request):
+    """
+    Часть ключа кэша от параметров запроса. Берём только параметры
+    пагинации: посторонние вроде ?utm= иначе плодили бы записи и
+    обходили блокировку пересчёта.
+    """
+    return urlencode([(name, request.GET[name]) for name in PAGE_PARAMS
+                      if name in request.GET])
+
+
+def _newest(queryset, *ordering):
+    return queryset.order_by(*ordering).values('id')[:1]
+
+
+def _scope_queries(tag):
+    """
+    Подзапросы-агрегаты, меняющиеся вместе с содержимым тега. Каждый
+    читает одну строку: по первичному ключу или с края индекса.
+    """
+    kind, _, pk = tag.partition(':')
+    newest_comment = _newest(Comment.objects.all(), '-id')
+    if kind == 'author':
+        return [
+            _newest(Post.objects.filter(author_id=pk), '-pub_date', '-id'),
+            UserStats.objects.filter(pk=pk).values('posts_count'),
+            newest_comment,
+        ]
+    if kind == 'group':
+        stats = GroupStats.objects.filter(pk=pk)
+        return [
+            _newest(Post.objects.filter(group_id=pk), '-pub_date', '-id'),
+            stats.values('posts_count'),
+            stats.values('last_post_at'),
+            newest_comment,
+        ]
+    if kind == 'post':
+        return [
+            Post.objects.filter(pk=pk).values('updated'),
+            _newest(Comment.objects.filter(post_id=pk), '-created', '-id'),
+        ]
+    if kind == 'follow':
+        stats = UserStats.objects.filter(pk=pk)
+        return [stats.values('followers_count'),
+                stats.values('following_count')]
+    return [
+        _newest(Post.objects.all(), '-id'),
+        Post.objects.order_by().annotate(
+            total=Func(template='COUNT(*)', output_field=IntegerField())
+        ).values('total'),
+        newest_comment,
+    ]
+
+
+def scope_state(tags):
+    """
+    Состояние тегов по данным БД одним запросом: для кэша в памяти
+    процесса, где версии тегов другого воркера не видны. Правки,
+    которых не ловят агрегаты (текст старого поста, удалённый
+    комментарий), проявятся не позже, чем сменится интервал
+    POSTS_CACHE_TIMEOUT, как и в кэше страниц этого воркера.
+    """
+    compiled = [queryset.query.sql_with_params()
+                for tag in sorted(tags) for queryset in _scope_queries(tag)]
+    sql = 'SELECT ' + ', '.join(f'({query})' for query, _ in compiled)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [param for _, params in compiled
+                             for param in params])
+        row = cursor.fetchone()
+    bucket = int(time.time() // settings.POSTS_CACHE_TIMEOUT)
+    return [str(value) for value in row] + [str(bucket)]
+
+
+def etag(request, tags):
+    """
+    Валидатор для условного GET: состояние тегов страницы, зритель
+    и параметры запроса. С общим кэшем это версии тегов — они
+    сдвигаются и при удалениях; иначе агрегаты из scope_state.
+    """
+    viewer = request.user.pk if request.user.is_authenticated else 0
+    state = tag_versions(tags) if is_shared() else scope_state(tags)
+    parts = state + [
+        str(viewer),
+        page_key(request),
+        getattr(settings, 'RELEASE', ''),
+    ]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
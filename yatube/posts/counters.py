@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from .models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+def _counts(queryset, field, user_ids):
+    if user_ids is not None:
+        queryset = queryset.filter(**{f'{field}__in': user_ids})
+    return dict(
+        queryset.values_list(field).annotate(total=Count('id')).order_by()
+    )
+
+
+def reconcile(user_ids=None, batch_size=500):
+    """
+    Пересчитывает счётчики по исходным таблицам одним проходом.
+    Возвращает число исправленных записей.
+    """
+    posts = _counts(Post.objects.all(), 'author', user_ids)
+    followers = _counts(Follow.objects.all(), 'author', user_ids)
+    following = _counts(Follow.objects.all(), 'user', user_ids)
+
+    users = User.objects.all()
+    stats = UserStats.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+    existing = {item.user_id: item for item in stats}
+
+    missing, changed = [], []
+    for user_id in users.values_list('id', flat=True).iterator():
+        actual = {
+            'posts_count': posts.get(user_id, 0),
+            'followers_count': followers.get(user_id, 0),
+            'following_count': following.get(user_id, 0),
+        }
+        item = existing.get(user_id)
+        if item is None:
+            missing.append(UserStats(user_id=user_id, **actual))
+        elif any(getattr(item, name) != value
+                 for name, value in actual.items()):
+            for name, value in actual.items():
+                setattr(item, name, value)
+            changed.append(item)
+
+    UserStats.objects.bulk_create(missing, batch_size=batch_size,
+                                  ignore_conflicts=True)
+    UserStats.objects.bulk_update(
+        changed,
+        ['posts_count', 'followers_count', 'following_count'],
+        batch_size=batch_size,
+    )
+    return len(missing) + len(changed)
+
+
+def bump(user_id, field, delta):
+    """
+    Атомарно сдвигает счётчик пользователя на delta.
+    Если строки ещё нет, счётчики пользователя пересчитываются целиком.
+    """
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    updated = stats.update(**{field: F(field) + delta})
+    if not updated and delta > 0:
+        reconcile(user_ids=[user_id])
@@ -0,0 +1,79 @@
+import csv
+import json
+
+from django.urls import reverse
+
+from .models import Comment, Post
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_FIELDS = ['type', 'ref', 'post', 'post_url', 'author', 'group', 'text',
+              'pub_date', 'created', 'image']
+
+
+def iter_records(author, chunk_size=500):
+    """
+    Посты и комментарии автора в формате, который принимает import_feed.
+    Комментарий к собственному посту ссылается на него по ref (post),
+    к чужому — адресом страницы поста (post_url): ref такого поста
+    в файле нет. Строки читаются через iterator(), поэтому память
+    не растёт с объёмом выгрузки.
+    """
+    posts = Post.objects.filter(author=author).order_by('id').values_list(
+        'id', 'text', 'pub_date', 'group__slug', 'image'
+    )
+    for post_id, text, pub_date, group, image in posts.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            'type': 'post',
+            'ref': post_id,
+            'author': author.username,
+            'group': group,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'image': image or None,
+        }
+
+    comments = Comment.objects.filter(author=author).order_by(
+        'id'
+    ).values_list('post_id', 'post__author__username', 'text', 'created')
+    for post_id, post_author, text, created in comments.iterator(
+        chunk_size=chunk_size
+    ):
+        record = {
+            'type': 'comment',
+            'author': author.username,
+            'text': text,
+            'created': created.isoformat(),
+        }
+        if post_author == author.username:
+            record['post'] = post_id
+        else:
+            record['post_url'] = reverse('post', kwargs={
+                'username': post_author, 'post_id': post_id,
+            })
+        yield record
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_lines(author, fmt='ndjson', chunk_size=500):
+    """
+    Построчно сериализует выгрузку в NDJSON или CSV.
+    """
+    records = iter_records(author, chunk_size=chunk_size)
+    if fmt == 'ndjson':
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+        return
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_FIELDS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
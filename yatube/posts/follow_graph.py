@@ -0,0 +1,117 @@
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+from .models import Follow
+from . import caching
+
+# user_id -> (версия тега follow:<user_id>, отсортированные id авторов).
+# array('q') — 8 байт на подписку вместо объекта int на каждую.
+_graph = {}
+
+# Сколько пользователей за раз: версий в одном get_many и id в одном
+# IN при частичной загрузке. Весь граф читается без IN — на сотнях
+# тысяч пользователей он упёрся бы в лимит параметров SQLite.
+LOAD_CHUNK = 500
+
+
+def enabled():
+    """
+    Граф держится в памяти процесса, а свежесть проверяет по версиям
+    тегов в кэше. С кэшем на процесс подписку, оформленную в другом
+    воркере, он не увидел бы до перезапуска, поэтому тогда подписки
+    читаются из БД.
+    """
+    return caching.is_shared()
+
+
+def _chunked(items, size):
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+
+def _versions(user_ids):
+    versions = {}
+    for chunk in _chunked(user_ids, LOAD_CHUNK):
+        tags = caching.tag_version_map(map(caching.follow_tag, chunk))
+        for user_id in chunk:
+            versions[user_id] = tags[caching.follow_tag(user_id)]
+    return versions
+
+
+def load(user_ids=None):
+    """
+    Загружает подписки всех пользователей при старте либо только
+    перечисленных. Весь граф читается одним потоком по user_id,
+    перечисленные — пачками по LOAD_CHUNK. Версии тегов читаются
+    до подписок, так что подписка, изменённая во время загрузки,
+    вызовет перечитывание. Возвращает число загруженных подписок.
+    """
+    if not enabled():
+        return 0
+    if user_ids is None:
+        versions = _versions(
+            Follow.objects.order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct().iterator()
+        )
+        batches = [Follow.objects.all()]
+    else:
+        versions = _versions(sorted(set(user_ids)))
+        batches = (Follow.objects.filter(user_id__in=chunk)
+                   for chunk in _chunked(versions, LOAD_CHUNK))
+    authors = {user_id: array('q') for user_id in versions}
+    edges = 0
+    for follows in batches:
+        rows = follows.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        )
+        for user_id, author_id in rows.iterator():
+            # подписчик, появившийся после чтения версий, загрузится
+            # при первом обращении
+            if user_id in authors:
+                authors[user_id].append(author_id)
+                edges += 1
+    for user_id, author_ids in authors.items():
+        _graph[user_id] = (versions[user_id], author_ids)
+    return edges
+
+
+def following(user_id, load_missing=True):
+    """
+    Id авторов, на которых подписан пользователь, по возрастанию.
+    В БД идём только при первом обращении или после подписки/отписки,
+    которые сдвигают версию тега; с load_missing=False вместо этого
+    возвращается None.
+    """
+    if not enabled():
+        if not load_missing:
+            return None
+        return array('q', Follow.objects.filter(user_id=user_id).order_by(
+            'author_id'
+        ).values_list('author_id', flat=True))
+    tag = caching.follow_tag(user_id)
+    version = caching.tag_version_map([tag])[tag]
+    entry = _graph.get(user_id)
+    if entry is None or entry[0] != version:
+        if not load_missing:
+            return None
+        load([user_id])
+        entry = _graph[user_id]
+    return entry[1]
+
+
+def is_following(user_id, author_id):
+    if not enabled():
+        return Follow.objects.filter(user_id=user_id,
+                                     author_id=author_id).exists()
+    authors = following(user_id)
+    index = bisect_left(authors, author_id)
+    return index < len(authors) and authors[index] == author_id
+
+
+def clear():
+    _graph.clear()
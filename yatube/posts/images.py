@@ -0,0 +1,83 @@
+import io
+import os
+import warnings
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from PIL import Image, ImageOps
+
+# Больше этого по длинной стороне не нужно ни ленте (960px),
+# ни странице поста с учётом HiDPI.
+POST_IMAGE_MAX_SIDE = 1920
+# Проверяется по заголовку до декодирования пикселей.
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 80
+# Ошибки Pillow на обрезанном или битом файле
+DECODE_ERRORS = (OSError, ValueError, SyntaxError)
+
+
+def _corrupt():
+    return ValidationError('Изображение повреждено.', code='image_corrupt')
+
+
+def _open(upload):
+    upload.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(upload)
+        except (Image.DecompressionBombError,
+                Image.DecompressionBombWarning):
+            image = None
+        except DECODE_ERRORS:
+            raise _corrupt()
+    if image is None or image.width * image.height > POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое.', code='image_too_large'
+        )
+    return image
+
+
+def _reencode(image):
+    box = (POST_IMAGE_MAX_SIDE, POST_IMAGE_MAX_SIDE)
+    image.draft('RGB', box)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(box, Image.LANCZOS, reducing_gap=3.0)
+
+    has_alpha = (
+        image.mode in ('RGBA', 'LA')
+        or (image.mode == 'P' and 'transparency' in image.info)
+    )
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    buffer = io.BytesIO()
+    # exif и icc не передаём — в файл они не попадут
+    image.save(buffer, POST_IMAGE_FORMAT, quality=POST_IMAGE_QUALITY,
+               method=4)
+    return buffer.getvalue()
+
+
+def process_upload(upload):
+    """
+    Приводит загруженную картинку к виду, в котором её стоит хранить:
+    уменьшает до POST_IMAGE_MAX_SIDE, поворачивает по EXIF и
+    перекодирует в WEBP без метаданных.
+
+    JPEG декодируется сразу в уменьшенном масштабе (draft), поэтому
+    снимок с камеры не разворачивается в память целиком. Заголовок
+    проверен ImageField, но обрезанный или битый файл всплывает
+    только при декодировании пикселей — это тоже ошибка формы.
+    """
+    image = _open(upload)
+    try:
+        content = _reencode(image)
+    except DECODE_ERRORS:
+        raise _corrupt()
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f'{stem}.{POST_IMAGE_FORMAT.lower()}',
+        content,
+        content_type=f'image/{POST_IMAGE_FORMAT.lower()}',
+    )
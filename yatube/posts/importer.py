@@ -0,0 +1,399 @@
+import contextlib
+import csv
+import json
+import sqlite3
+from itertools import islice
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Max
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, rollups, timeline
+from .counters import reconcile
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+RECORD_TYPES = ('group', 'post', 'comment', 'follow')
+
+# Больше затронутых пользователей — дешевле пересчитать всё целиком
+PARTIAL_REBUILD_LIMIT = 500
+# Параметров в одном запросе к словарю ref
+REF_CHUNK = 500
+
+
+def read_records(file, fmt, record_type=None):
+    """
+    Построчно читает записи из JSONL или CSV, не загружая файл в память.
+    """
+    if fmt == 'jsonl':
+        rows = (json.loads(line) for line in file if line.strip())
+    else:
+        rows = csv.DictReader(file)
+    for row in rows:
+        row_type = row.pop('type', None) or record_type
+        if row_type not in RECORD_TYPES:
+            raise ValueError(f'Неизвестный тип записи: {row_type!r}')
+        yield row_type, {key: value for key, value in row.items()
+                         if value not in ('', None)}
+
+
+def reserve_post_ids(count):
+    """
+    Забирает у последовательности id постов count номеров, которых
+    не получит ни одна другая вставка, в том числе с живого сайта
+    во время импорта. Вызывается внутри транзакции пакета.
+    """
+    table = Post._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)", [table, count]
+            )
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == 'sqlite':
+            # UPDATE первым же запросом берёт блокировку на запись;
+            # AUTOINCREMENT не выдаст номера меньше seq
+            cursor.execute(
+                f'INSERT INTO sqlite_sequence (name, seq) '
+                f'SELECT %s, COALESCE(MAX(id), 0) FROM {table} '
+                f'WHERE NOT EXISTS '
+                f'(SELECT 1 FROM sqlite_sequence WHERE name = %s)',
+                [table, table]
+            )
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s',
+                [count, table]
+            )
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+            )
+            last = cursor.fetchone()[0]
+            return range(last - count + 1, last + 1)
+    # остальные СУБД: конфликт с параллельной вставкой всплывёт
+    # IntegrityError и остановит импорт
+    start = (Post.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    return range(start, start + count)
+
+
+class RefMap:
+    """
+    Соответствие ref поста из файла и его id в базе. Хранится во
+    временной базе SQLite на диске, поэтому память не растёт
+    с размером файла.
+    """
+
+    def __init__(self):
+        # пустое имя — приватная временная база, удаляется при close()
+        self.db = sqlite3.connect('')
+        self.db.execute(
+            'CREATE TABLE refs (ref TEXT PRIMARY KEY, post_id INTEGER)'
+        )
+
+    def update(self, pairs):
+        self.db.executemany('INSERT OR REPLACE INTO refs VALUES (?, ?)',
+                            pairs)
+
+    def get_many(self, refs):
+        found = {}
+        refs = iter(set(refs))
+        chunk = list(islice(refs, REF_CHUNK))
+        while chunk:
+            placeholders = ', '.join('?' * len(chunk))
+            found.update(self.db.execute(
+                f'SELECT ref, post_id FROM refs '
+                f'WHERE ref IN ({placeholders})', chunk
+            ))
+            chunk = list(islice(refs, REF_CHUNK))
+        return found
+
+    def close(self):
+        self.db.close()
+
+
+def post_address(url):
+    """
+    Автор и id поста из адреса его страницы (поле post_url выгрузки).
+    """
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        match = None
+    if match is None or match.url_name != 'post':
+        raise ValueError(f'post_url не ведёт на страницу поста: {url!r}')
+    return match.kwargs['username'], match.kwargs['post_id']
+
+
+@contextlib.contextmanager
+def explicit_dates(*fields):
+    """
+    Временно отключает auto_now_add, чтобы bulk_create сохранил
+    даты из импортируемых данных.
+    """
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class FeedImporter:
+    """
+    Пакетная загрузка групп, постов, комментариев и подписок.
+    Пользователей и группы разрешает по именам через словари в памяти.
+    id постов резервирует у базы на каждый пакет (reserve_post_ids),
+    чтобы комментарии могли ссылаться на посты из того же файла
+    по полю ref; соответствие ref и id лежит на диске в RefMap.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.counts = dict.fromkeys(RECORD_TYPES, 0)
+        self.skipped = 0
+        self.user_ids = {}
+        self.group_ids = dict(Group.objects.values_list('slug', 'id'))
+        self.post_refs = RefMap()
+        self.now = timezone.now()
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.touched_readers = set()
+        self.new_user_ids = set()
+
+    def add(self, record_type, row):
+        self.buffers[record_type].append(row)
+        if len(self.buffers[record_type]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Сбрасывает все буферы одной транзакцией в порядке зависимостей.
+        """
+        if not any(self.buffers.values()):
+            return
+        with transaction.atomic():
+            self._resolve_users()
+            self._flush_groups()
+            self._flush_posts()
+            self._flush_comments()
+            self._flush_follows()
+
+    def finish(self):
+        """
+        Дописывает остаток и пересчитывает производные данные.
+        """
+        self.flush()
+        return self.rebuild()
+
+    def rebuild(self):
+        """
+        Пересчитывает производные данные, которые bulk_create
+        не обновляет сигналами. После ошибки импорта вызывается
+        для уже записанных пакетов.
+        """
+        users = readers = None
+        if len(self.touched_authors) < PARTIAL_REBUILD_LIMIT:
+            readers = self.touched_readers | set(
+                Follow.objects.filter(author_id__in=self.touched_authors)
+                .values_list('user_id', flat=True)
+            )
+            if len(readers) < PARTIAL_REBUILD_LIMIT:
+                users = list(
+                    readers | self.touched_authors | self.new_user_ids
+                )
+                readers = list(readers)
+            else:
+                readers = None
+        reconcile(user_ids=users)
+        timeline.rebuild(user_ids=readers)
+        groups = list(self.touched_groups - {None})
+        rollups.rebuild(
+            group_ids=groups if len(groups) < PARTIAL_REBUILD_LIMIT else None
+        )
+        caching.invalidate(
+            caching.FEED_TAG,
+            *map(caching.author_tag, self.touched_authors),
+            *map(caching.group_tag, self.touched_groups - {None}),
+            *map(caching.follow_tag, self.touched_readers),
+        )
+        return self.counts
+
+    def close(self):
+        self.post_refs.close()
+
+    def _resolve_users(self):
+        names = set()
+        for row in self.buffers['post'] + self.buffers['comment']:
+            names.add(row['author'])
+        for row in self.buffers['follow']:
+            names.update((row['user'], row['author']))
+        missing = names - self.user_ids.keys()
+        if not missing:
+            return
+        self.user_ids.update(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'id')
+        )
+        new = missing - self.user_ids.keys()
+        if new:
+            User.objects.bulk_create(
+                [User(username=name, password='!') for name in new],
+                batch_size=self.batch_size,
+            )
+            created = dict(
+                User.objects.filter(username__in=new)
+                .values_list('username', 'id')
+            )
+            self.user_ids.update(created)
+            self.new_user_ids.update(created.values())
+
+    def _date(self, row, key):
+        value = row.get(key)
+        return parse_datetime(value) if value else self.now
+
+    def _flush_groups(self):
+        rows, self.buffers['group'] = self.buffers['group'], []
+        if not rows:
+            return
+        Group.objects.bulk_create(
+            [
+                Group(slug=row['slug'], title=row.get('title', row['slug']),
+                      description=row.get('description', ''))
+                for row in rows
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        group_ids = dict(
+            Group.objects.filter(slug__in=[row['slug'] for row in rows])
+            .values_list('slug', 'id')
+        )
+        self.group_ids.update(group_ids)
+        self.touched_groups.update(group_ids.values())
+        self.counts['group'] += len(rows)
+
+    def _flush_posts(self):
+        rows, self.buffers['post'] = self.buffers['post'], []
+        if not rows:
+            return
+        posts = []
+        refs = []
+        for row, post_id in zip(rows, reserve_post_ids(len(rows))):
+            post = Post(
+                id=post_id,
+                text=row['text'],
+                author_id=self.user_ids[row['author']],
+                group_id=self.group_ids.get(row.get('group')),
+                image=row.get('image'),
+                pub_date=self._date(row, 'pub_date'),
+            )
+            if 'ref' in row:
+                refs.append((str(row['ref']), post.id))
+            self.touched_authors.add(post.author_id)
+            self.touched_groups.add(post.group_id)
+            posts.append(post)
+        pub_date = Post._meta.get_field('pub_date')
+        with explicit_dates(pub_date):
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        self.post_refs.update(refs)
+        self.counts['post'] += len(posts)
+
+    def _flush_comments(self):
+        rows, self.buffers['comment'] = self.buffers['comment'], []
+        if not rows:
+            return
+        post_ids = self._comment_post_ids(rows)
+        comments = []
+        for row, post_id in zip(rows, post_ids):
+            if post_id is None:
+                self.skipped += 1
+                continue
+            comments.append(Comment(
+                text=row['text'],
+                post_id=post_id,
+                author_id=self.user_ids[row['author']],
+                created=self._date(row, 'created'),
+            ))
+        created = Comment._meta.get_field('created')
+        with explicit_dates(created):
+            Comment.objects.bulk_create(comments,
+                                        batch_size=self.batch_size)
+        self.counts['comment'] += len(comments)
+
+    def _comment_post_ids(self, rows):
+        """
+        Посты комментариев: post — ref поста, встретившегося в файле
+        раньше, post_id — id поста, который уже есть в базе. Число
+        в post не трактуется как id: ref поста из следующего пакета
+        иначе молча привязал бы комментарий к чужому посту.
+
+        post_url — адрес чужого поста из выгрузки пользователя. Такой
+        комментарий привязывается, только если в базе есть пост с тем
+        же id и автором, иначе пропускается (None вместо id).
+        """
+        explicit = {int(row['post_id']) for row in rows if 'post_id' in row}
+        existing = set(
+            Post.objects.filter(id__in=explicit).values_list('id', flat=True)
+        ) if explicit else set()
+        refs = self.post_refs.get_many(
+            str(row['post']) for row in rows
+            if 'post_id' not in row and 'post_url' not in row
+        )
+        foreign = self._foreign_post_ids(rows)
+        return [self._comment_post_id(row, existing, refs, foreign)
+                for row in rows]
+
+    def _comment_post_id(self, row, existing, refs, foreign):
+        if 'post_url' in row:
+            return foreign.get(row['post_url'])
+        if 'post_id' in row:
+            post_id = int(row['post_id'])
+            if post_id not in existing:
+                raise ValueError(
+                    f'Комментарий к несуществующему посту id={post_id}'
+                )
+            return post_id
+        ref = str(row['post'])
+        post_id = refs.get(ref)
+        if post_id is None:
+            raise ValueError(
+                f'Комментарий к посту {ref}, которого нет выше в файле'
+            )
+        return post_id
+
+    def _foreign_post_ids(self, rows):
+        addresses = {row['post_url']: post_address(row['post_url'])
+                     for row in rows if 'post_url' in row}
+        if not addresses:
+            return {}
+        found = set(
+            Post.objects.filter(
+                id__in={post_id for _, post_id in addresses.values()}
+            ).values_list('author__username', 'id')
+        )
+        return {url: address[1] for url, address in addresses.items()
+                if address in found}
+
+    def _flush_follows(self):
+        rows, self.buffers['follow'] = self.buffers['follow'], []
+        if not rows:
+            return
+        follows = [
+            Follow(user_id=self.user_ids[row['user']],
+                   author_id=self.user_ids[row['author']])
+            for row in rows
+            if row['user'] != row['author']
+        ]
+        Follow.objects.bulk_create(follows, batch_size=self.batch_size,
+                                   ignore_conflicts=True)
+        for follow in follows:
+            self.touched_readers.add(follow.user_id)
+            self.touched_authors.add(follow.author_id)
+        self.counts['follow'] += len(rows)
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import EXPORT_FORMATS, iter_lines
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии пользователя в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                            default='ndjson')
+        parser.add_argument('--output', help='файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+
+        lines = iter_lines(author, options['format'],
+                           chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
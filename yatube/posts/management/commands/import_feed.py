@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts.importer import RECORD_TYPES, FeedImporter, read_records
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает группы, посты, комментарии и подписки '
+            'из JSONL или CSV пакетами bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл с данными')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='по умолчанию — по расширению файла')
+        parser.add_argument('--type', choices=RECORD_TYPES,
+                            help='тип записей, если в файле нет поля type')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        importer = FeedImporter(batch_size=options['batch_size'])
+        start = time.perf_counter()
+        try:
+            with open(path, newline='', encoding='utf-8') as file:
+                for record_type, row in read_records(file, fmt,
+                                                     options['type']):
+                    importer.add(record_type, row)
+            counts = importer.finish()
+        except (KeyError, ValueError, IntegrityError) as error:
+            # пакеты до ошибки уже записаны: приводим в порядок
+            # их счётчики и ленты и сообщаем, сколько их
+            importer.rebuild()
+            kind = ('Конфликт с данными в базе'
+                    if isinstance(error, IntegrityError)
+                    else 'Ошибка в данных')
+            raise CommandError(
+                f'{kind}: {error}. Записано до ошибки: '
+                f'{sum(importer.counts.values())} строк'
+            )
+        finally:
+            importer.close()
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        for record_type, count in counts.items():
+            self.stdout.write(f'{record_type}: {count}')
+        if importer.skipped:
+            self.stdout.write(
+                f'пропущено комментариев к постам, которых нет в базе: '
+                f'{importer.skipped}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} строк за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else 0:.0f} строк/с)'
+        ))
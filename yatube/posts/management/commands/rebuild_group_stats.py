@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import caching, rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает сводки каталога групп по таблице постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append',
+                            dest='group_ids',
+                            help='id группы; можно указать несколько')
+
+    def handle(self, *args, **options):
+        groups = rollups.rebuild(group_ids=options['group_ids'])
+        caching.invalidate(caching.FEED_TAG)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано групп: {groups}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики постов и подписок пользователей с данными.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Исправлено записей: {fixed}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            dest='user_ids',
+                            help='id пользователя; можно указать несколько')
+
+    def handle(self, *args, **options):
+        users = timeline.rebuild(user_ids=options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перестроено лент: {users}'
+        ))
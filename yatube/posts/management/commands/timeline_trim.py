@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Обрезает материализованные ленты до заданной длины.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None,
+                            help='сколько записей оставить в каждой ленте')
+
+    def handle(self, *args, **options):
+        removed = timeline.trim(options['keep'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей: {removed}'))
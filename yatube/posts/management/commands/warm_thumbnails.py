@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Генерирует недостающие миниатюры изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.POSTS_THUMBNAIL_WORKERS,
+            help='число процессов; 0 — в текущем процессе',
+        )
+        parser.add_argument('--chunk-size', type=int, default=16)
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True)
+        workers = options['workers']
+        done = failed = 0
+        if workers:
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=thumbnails.init_worker)
+            with pool:
+                results = pool.map(self.warm, names.iterator(),
+                                   chunksize=options['chunk_size'])
+                for ok in results:
+                    done += ok
+                    failed += not ok
+        else:
+            for name in names.iterator():
+                ok = self.warm(name)
+                done += ok
+                failed += not ok
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр готово: {done}, ошибок: {failed}'
+        ))
+
+    @staticmethod
+    def warm(name):
+        try:
+            thumbnails.generate(name)
+        except Exception:
+            return False
+        return True
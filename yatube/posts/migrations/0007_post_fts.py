@@ -0,0 +1,16 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:30
+
+from django.db import migrations
+
+from posts import search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(search.install, search.uninstall),
+    ]
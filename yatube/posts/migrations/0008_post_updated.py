@@ -0,0 +1,22 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+from posts import search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='date updated'),
+        ),
+        # AddField пересоздаёт posts_post на SQLite вместе с триггерами
+        migrations.RunPython(search.install, migrations.RunPython.noop),
+    ]
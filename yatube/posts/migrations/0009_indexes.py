@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+def dedupe_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = (
+        Follow.objects.values('user', 'author')
+        .annotate(keep=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    affected = set()
+    for row in duplicates:
+        Follow.objects.filter(
+            user=row['user'], author=row['author']
+        ).exclude(id=row['keep']).delete()
+        affected.update((row['user'], row['author']))
+    for stats in UserStats.objects.filter(user__in=affected):
+        stats.followers_count = Follow.objects.filter(
+            author=stats.user_id
+        ).count()
+        stats.following_count = Follow.objects.filter(
+            user=stats.user_id
+        ).count()
+        stats.save(update_fields=['followers_count', 'following_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date'], name='post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_date_idx'),
+        ),
+        migrations.RunPython(dedupe_follows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
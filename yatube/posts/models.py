@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -13,20 +14,54 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """
+        Посты для ленты: автор и группа в том же запросе,
+        число комментариев — коррелированным подзапросом.
+
+        JOIN с GROUP BY заставлял SQLite сортировать всю выборку
+        во временном B-tree; подзапрос оставляет порядок индексу
+        (author, -pub_date) и позволяет остановиться на LIMIT.
+        """
+        comments = (
+            Comment.objects.filter(post=models.OuterRef('pk'))
+            .order_by().values('post')
+            .annotate(total=models.Count('*')).values('total')
+        )
+        return self.select_related('author', 'group').annotate(
+            comment_count=Coalesce(
+                models.Subquery(comments,
+                                output_field=models.IntegerField()),
+                0
+            )
+        )
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    updated = models.DateTimeField('date updated', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='posts')
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, blank=True,
                               null=True, related_name='posts')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -40,9 +75,100 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='follower')
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class UserStats(models.Model):
+    """
+    Хранимые счётчики пользователя для шапки профиля.
+    Поддерживаются сигналами, сверяются командой reconcile_counters.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Материализованная лента подписок: строка на пару (читатель, пост).
+    Заполняется при публикации поста (fan-out-on-write).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_date_idx'),
+        ]
+
+
+class GroupStats(models.Model):
+    """
+    Сводка по группе для каталога групп: число постов и время
+    последней публикации. Поддерживается сигналами,
+    пересобирается командой rebuild_group_stats.
+    """
+    group = models.OneToOneField(Group, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.group_id}: {self.posts_count}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-last_post_at'],
+                         name='groupstats_activity_idx'),
+        ]
+
+
+class GroupAuthorStats(models.Model):
+    """
+    Число постов автора в группе — для списка самых активных авторов.
+    """
+    group = models.ForeignKey(Group, on_delete=models.CASCADE,
+                              related_name='author_stats')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='group_stats')
+    posts_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'author'],
+                                    name='unique_group_author'),
+        ]
+        indexes = [
+            models.Index(fields=['group', '-posts_count'],
+                         name='group_author_rank_idx'),
+        ]
@@ -0,0 +1,245 @@
+import base64
+import binascii
+import copy
+import datetime as dt
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+
+
+def encode_cursor(values):
+    """
+    Упаковывает значения ключа сортировки в непрозрачный токен.
+    """
+    raw = '|'.join(
+        value.isoformat() if isinstance(value, dt.datetime) else str(value)
+        for value in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Распаковывает токен курсора, для битого токена возвращает None.
+    """
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        stamp, pk = raw.split('|')
+        stamp, pk = parse_datetime(stamp), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    # parse_datetime не бросает исключение на мусор, а возвращает None
+    if stamp is None:
+        return None
+    return stamp, pk
+
+
+def cursor_filter(date_field, pk_field, values, lookup):
+    """
+    Условие «строго после ключа (дата, pk)» для lookup 'lt' или 'gt'.
+    Нестрогое сравнение даты вынесено отдельно: оно задаёт границу
+    диапазона индекса (..., дата, pk), и SQLite читает его с курсора
+    до LIMIT, а не собирает все строки под OR и сортирует их.
+    """
+    date, pk = values
+    return Q(**{f'{date_field}__{lookup}e': date}) & (
+        Q(**{f'{date_field}__{lookup}': date})
+        | Q(**{f'{pk_field}__{lookup}': pk})
+    )
+
+
+class CursorPage(Page):
+    """
+    Страница курсорной пагинации: вместо номера хранит токены
+    соседних страниц, поэтому не требует COUNT(*) и OFFSET.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    # номеров и позиций у курсорной страницы нет; None, а не
+    # исключение, чтобы шаблон для нумерованных страниц не падал
+    def next_page_number(self):
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset-пагинация по паре полей (дата, id).
+
+    ordering задаёт порядок выдачи, например ('-pub_date', '-id'):
+    «следующая» страница продолжает выдачу в этом порядке,
+    «предыдущая» — идёт в обратную сторону. Глубина страницы
+    не влияет на стоимость запроса — это всегда range scan по индексу.
+    """
+    cursor = True
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id')):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = ordering[0].startswith('-')
+
+    def _after(self, values, forward):
+        date_field, pk_field = self.fields
+        lookup = 'lt' if self.descending == forward else 'gt'
+        return cursor_filter(date_field, pk_field, values, lookup)
+
+    def _key(self, obj):
+        # строки из values() приходят словарями
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def page_query(self, after=None, before=None):
+        """
+        Запрос страницы после токена after или перед токеном before:
+        пара (queryset на per_page + 1 строк, направление).
+        Некорректный токен трактуется как запрос первой страницы.
+        """
+        queryset = self.object_list
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        limit = self.per_page + 1
+
+        if before is not None:
+            reverse_ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+            return (
+                queryset.filter(self._after(before, forward=False))
+                .order_by(*reverse_ordering)[:limit],
+                'before',
+            )
+        if after is not None:
+            return (
+                queryset.filter(self._after(after, forward=True))[:limit],
+                'after',
+            )
+        return queryset[:limit], None
+
+    def make_page(self, rows, direction=None):
+        """
+        Собирает страницу из строк, выбранных по page_query. Возвращает
+        None, если перед токеном before записей не осталось.
+        """
+        per_page = self.per_page
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+        if direction == 'before':
+            if not rows:
+                return None
+            rows = rows[::-1]
+            return CursorPage(
+                rows, self,
+                next_cursor=encode_cursor(self._key(rows[-1])),
+                previous_cursor=(
+                    encode_cursor(self._key(rows[0])) if has_more else None
+                ),
+            )
+
+        return CursorPage(
+            rows, self,
+            next_cursor=(
+                encode_cursor(self._key(rows[-1])) if has_more else None
+            ),
+            previous_cursor=(
+                encode_cursor(self._key(rows[0]))
+                if direction == 'after' and rows else None
+            ),
+        )
+
+    def get_cursor_page(self, after=None, before=None):
+        """
+        Возвращает страницу после токена after или перед токеном before.
+        """
+        queryset, direction = self.page_query(after, before)
+        page = self.make_page(list(queryset), direction)
+        if page is None:
+            return self.get_cursor_page()
+        return page
+
+
+def use_cursor(request):
+    """
+    Курсорный режим включается настройкой POSTS_CURSOR_PAGINATION
+    или явным токеном в запросе; ссылки вида ?page=N продолжают
+    работать по номеру страницы.
+    """
+    if 'after' in request.GET or 'before' in request.GET:
+        return True
+    if 'page' in request.GET:
+        return False
+    return getattr(settings, 'POSTS_CURSOR_PAGINATION', False)
+
+
+def paginate(request, queryset, per_page=POSTS_PER_PAGE,
+             ordering=('-pub_date', '-id')):
+    """
+    Возвращает страницу выдачи для запроса: курсорную либо нумерованную.
+    """
+    if use_cursor(request):
+        paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+        return paginator.get_cursor_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def comments_paginator(post, per_page=COMMENTS_PER_PAGE):
+    """
+    Комментарии к посту от старых к новым; авторы выбираются тем же
+    запросом.
+    """
+    return CursorPaginator(post.comments.select_related('author'),
+                           per_page, ordering=('created', 'id'))
+
+
+def paginate_comments(post, after=None, per_page=COMMENTS_PER_PAGE):
+    return comments_paginator(post, per_page).get_cursor_page(after=after)
+
+
+def detach_page(page):
+    """
+    Готовит страницу к кэшированию: фиксирует список объектов и
+    отвязывает пагинатор от queryset, иначе pickle выберет всю таблицу.
+    """
+    paginator = copy.copy(page.paginator)
+    if not isinstance(page, CursorPage):
+        paginator.count = page.paginator.count
+    paginator.object_list = []
+    page.paginator = paginator
+    page.object_list = list(page.object_list)
+    return page
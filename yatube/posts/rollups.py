@@ -0,0 +1,159 @@
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import (Case, Count, DateTimeField, F, Max, OuterRef,
+                              Subquery, Value, When)
+
+from .models import Group, GroupAuthorStats, GroupStats, Post
+
+GROUPS_PER_PAGE = 50
+TOP_AUTHORS = 3
+
+
+def rebuild(group_ids=None, batch_size=500):
+    """
+    Пересобирает сводки групп по таблице постов.
+    Возвращает число обработанных групп.
+    """
+    groups = Group.objects.all()
+    posts = Post.objects.filter(group__isnull=False).order_by()
+    if group_ids is not None:
+        groups = groups.filter(id__in=group_ids)
+        posts = posts.filter(group_id__in=group_ids)
+    totals = {
+        row['group']: row
+        for row in posts.values('group').annotate(
+            total=Count('id'), last=Max('pub_date')
+        )
+    }
+    group_ids = list(groups.values_list('id', flat=True))
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id__in=group_ids).delete()
+        GroupAuthorStats.objects.filter(group_id__in=group_ids).delete()
+        GroupStats.objects.bulk_create(
+            [
+                GroupStats(
+                    group_id=group_id,
+                    posts_count=totals.get(group_id, {}).get('total', 0),
+                    last_post_at=totals.get(group_id, {}).get('last'),
+                )
+                for group_id in group_ids
+            ],
+            batch_size=batch_size,
+        )
+        GroupAuthorStats.objects.bulk_create(
+            [
+                GroupAuthorStats(group_id=row['group'],
+                                 author_id=row['author'],
+                                 posts_count=row['total'])
+                for row in posts.values('group', 'author').annotate(
+                    total=Count('id')
+                )
+            ],
+            batch_size=batch_size,
+        )
+    return len(group_ids)
+
+
+def post_added(group_id, author_id, pub_date):
+    """
+    Учитывает новый пост группы: счётчики и время активности
+    сдвигаются одним UPDATE. Нет строки сводки — группа
+    пересобирается целиком.
+    """
+    if group_id is None:
+        return
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_at=Case(
+            When(last_post_at__gte=pub_date, then=F('last_post_at')),
+            # без output_field SQLite сохранит строку с поясом,
+            # и сравнения с pub_date перестанут работать
+            default=Value(pub_date, output_field=DateTimeField()),
+        ),
+    )
+    if not updated:
+        rebuild(group_ids=[group_id])
+        return
+    author_stats = GroupAuthorStats.objects.filter(group_id=group_id,
+                                                   author_id=author_id)
+    if author_stats.update(posts_count=F('posts_count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            GroupAuthorStats.objects.create(group_id=group_id,
+                                            author_id=author_id,
+                                            posts_count=1)
+    except IntegrityError:
+        author_stats.update(posts_count=F('posts_count') + 1)
+
+
+def post_removed(group_id, author_id, pub_date):
+    """
+    Вычитает пост из сводки. Время активности пересчитывается
+    только если удалён самый свежий пост группы.
+    """
+    if group_id is None:
+        return
+    stats = GroupStats.objects.filter(group_id=group_id)
+    stats.filter(posts_count__gte=1).update(
+        posts_count=F('posts_count') - 1
+    )
+    if stats.filter(last_post_at__lte=pub_date).exists():
+        stats.update(last_post_at=Post.objects.filter(
+            group_id=group_id
+        ).aggregate(last=Max('pub_date'))['last'])
+    author_stats = GroupAuthorStats.objects.filter(group_id=group_id,
+                                                   author_id=author_id)
+    author_stats.filter(posts_count__gte=1).update(
+        posts_count=F('posts_count') - 1
+    )
+    author_stats.filter(posts_count=0).delete()
+
+
+def top_authors(group_ids, limit=TOP_AUTHORS):
+    """
+    Самые активные авторы групп одним запросом: для каждой
+    группы коррелированный подзапрос берёт limit строк по индексу
+    (group, -posts_count).
+    """
+    top = GroupAuthorStats.objects.filter(
+        group_id=OuterRef('group_id')
+    ).order_by('-posts_count', 'author_id').values('id')[:limit]
+    rows = GroupAuthorStats.objects.filter(
+        group_id__in=group_ids, id__in=Subquery(top)
+    ).order_by('group_id', '-posts_count', 'author_id').values(
+        'group_id', 'author__username', 'posts_count'
+    )
+    authors = {}
+    for row in rows:
+        authors.setdefault(row['group_id'], []).append({
+            'username': row['author__username'],
+            'posts_count': row['posts_count'],
+        })
+    return authors
+
+
+def directory(page_number=None, per_page=GROUPS_PER_PAGE):
+    """
+    Страница каталога групп: сначала недавно активные.
+    Строки — словари, готовые и для шаблона, и для JSON.
+    """
+    groups = GroupStats.objects.values(
+        'group_id', 'group__slug', 'group__title', 'group__description',
+        'posts_count', 'last_post_at',
+    ).order_by(F('last_post_at').desc(nulls_last=True), 'group__title')
+    page = Paginator(groups, per_page).get_page(page_number)
+    rows = list(page.object_list)
+    authors = top_authors([row['group_id'] for row in rows])
+    page.object_list = [
+        {
+            'slug': row['group__slug'],
+            'title': row['group__title'],
+            'description': row['group__description'],
+            'posts_count': row['posts_count'],
+            'last_post_at': row['last_post_at'],
+            'top_authors': authors.get(row['group_id'], []),
+        }
+        for row in rows
+    ]
+    return page
@@ -0,0 +1,140 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+
+def install(apps=None, schema_editor=None):
+    """
+    Создаёт FTS5-индекс по тексту постов и триггеры синхронизации.
+    Django пересоздаёт таблицу posts_post при AddField на SQLite,
+    теряя триггеры, поэтому такие миграции вызывают install повторно.
+    """
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for sql in CREATE_TRIGGERS:
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def uninstall(apps=None, schema_editor=None):
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def match_expression(query):
+    """
+    Превращает пользовательский запрос в безопасное выражение MATCH:
+    каждое слово — отдельная фраза, последнее ищется по префиксу.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return ''
+    phrases = [f'"{word}"' for word in words]
+    phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+class SearchResults:
+    """
+    Результаты полнотекстового поиска, упорядоченные по релевантности.
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, query):
+        self.match = match_expression(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step:
+            raise TypeError('SearchResults supports only plain slices.')
+        if not self.match:
+            return []
+        offset = item.start or 0
+        limit = -1 if item.stop is None else item.stop - offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def matching_ids_sql(query):
+    """
+    SQL-подзапрос с id подходящих постов для фильтрации queryset.
+    """
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(query)],
+    )
+
+
+def search_posts(query):
+    if connection.vendor == 'sqlite':
+        return SearchResults(query)
+    query = query.strip()
+    if not query:
+        return Post.objects.none()
+    return Post.objects.for_feed().filter(text__icontains=query)
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import caching, counters, rollups, thumbnails, timeline
+from .models import Comment, Follow, Group, GroupStats, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump(instance.author_id, 'posts_count', 1)
+        rollups.post_added(instance.group_id, instance.author_id,
+                           instance.pub_date)
+        timeline.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, 'posts_count', -1)
+    rollups.post_removed(instance.group_id, instance.author_id,
+                         instance.pub_date)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump(instance.author_id, 'followers_count', 1)
+        counters.bump(instance.user_id, 'following_count', 1)
+        timeline.follow_added(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, 'followers_count', -1)
+    counters.bump(instance.user_id, 'following_count', -1)
+    timeline.follow_removed(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    instance._previous_group_ids = ()
+    instance._previous_image = None
+    if instance.pk and not raw:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image'
+        ).first()
+        if previous is not None:
+            instance._previous_group_ids = (previous[0],)
+            instance._previous_image = previous[1]
+
+
+@receiver(post_save, sender=Post)
+def post_moved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    for group_id in getattr(instance, '_previous_group_ids', ()):
+        if group_id != instance.group_id:
+            rollups.post_removed(group_id, instance.author_id,
+                                 instance.pub_date)
+            rollups.post_added(instance.group_id, instance.author_id,
+                               instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnail(sender, instance, raw=False, **kwargs):
+    name = instance.image.name if instance.image else None
+    previous = getattr(instance, '_previous_image', None)
+    if not raw and name and name != previous:
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    caching.invalidate(*caching.post_tags(
+        instance, getattr(instance, '_previous_group_ids', ())
+    ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).first()
+    if post is not None:
+        caching.invalidate(*caching.post_tags(post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    caching.invalidate(caching.follow_tag(instance.user_id),
+                       caching.author_tag(instance.author_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    # название и ссылка группы есть и в лентах авторов; после удаления
+    # (SET_NULL) постов группы уже не найти, поэтому pre_delete
+    author_ids = Post.objects.filter(group=instance).values_list(
+        'author_id', flat=True
+    ).distinct()
+    caching.invalidate(caching.FEED_TAG, caching.group_tag(instance.id),
+                       *map(caching.author_tag, author_ids))
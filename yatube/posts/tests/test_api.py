@@ -0,0 +1,111 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.posts = [
+            Post.objects.create(text=f'text {i}', author=cls.user,
+                                group=cls.group)
+            for i in range(12)
+        ]
+        Comment.objects.create(text='comment', post=cls.posts[-1],
+                               author=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.__class__.reader)
+
+    def get_json(self, client, url, data=None):
+        response = client.get(url, data or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(response.content)
+
+    def test_feeds(self):
+        """Ленты отдают компактные записи и курсор следующей страницы."""
+        user = self.__class__.user
+        urls = {
+            'index': reverse('api:index'),
+            'group': reverse('api:group_posts',
+                             kwargs={'slug': self.group.slug}),
+            'profile': reverse('api:profile',
+                               kwargs={'username': user.username}),
+        }
+        for name, url in urls.items():
+            with self.subTest(feed=name):
+                _, data = self.get_json(self.guest_client, url)
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0], {
+                    'id': self.posts[-1].id,
+                    'text': 'text 11',
+                    'pub_date': data['results'][0]['pub_date'],
+                    'author': user.username,
+                    'group': self.group.slug,
+                    'image': None,
+                    'comment_count': 1,
+                })
+                _, rest = self.get_json(self.guest_client, url,
+                                        {'after': data['next']})
+                self.assertEqual([post['text'] for post in rest['results']],
+                                 ['text 1', 'text 0'])
+                self.assertIsNone(rest['next'])
+
+    def test_follow_feed(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        response, data = self.get_json(self.reader_client, url)
+        self.assertEqual(len(data['results']), 10)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_post(self):
+        post = self.posts[-1]
+        _, data = self.get_json(self.guest_client, reverse(
+            'api:post', kwargs={'username': self.user.username,
+                                'post_id': post.id}
+        ))
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']['results']],
+            ['comment']
+        )
+        response = self.guest_client.get(reverse(
+            'api:post', kwargs={'username': 'reader', 'post_id': post.id}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get(self):
+        """Ответы кэшируемы: есть ETag и max-age, повтор даёт 304."""
+        url = reverse('api:index')
+        response, _ = self.get_json(self.guest_client, url)
+        self.assertIn('max-age', response['Cache-Control'])
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_smaller_than_html(self):
+        html = self.guest_client.get(reverse('index'))
+        api = self.guest_client.get(reverse('api:index'))
+        self.assertLess(len(api.content) * 3, len(html.content))
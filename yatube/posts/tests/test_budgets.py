@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.budgets import VIEW_BUDGETS
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ViewBudgetsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.post = Post.objects.create(
+            text='кошка', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.__class__.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.__class__.reader)
+
+    def requests(self):
+        user = self.__class__.user
+        return {
+            'index': (self.authorized_user, reverse('index'), {}),
+            'group_posts': (
+                self.authorized_user,
+                reverse('group_posts', kwargs={'slug': self.group.slug}),
+                {},
+            ),
+            'profile': (
+                self.reader_client,
+                reverse('profile', kwargs={'username': user.username}),
+                {},
+            ),
+            'post': (
+                self.authorized_user,
+                reverse('post', kwargs={'username': user.username,
+                                        'post_id': self.post.id}),
+                {},
+            ),
+            'post_comments': (
+                self.authorized_user,
+                reverse('post_comments', kwargs={'username': user.username,
+                                                 'post_id': self.post.id}),
+                {},
+            ),
+            'follow_index': (self.reader_client, reverse('follow_index'), {}),
+            'search': (self.authorized_user, reverse('search'),
+                       {'q': 'кошка'}),
+            'groups': (self.authorized_user, reverse('groups'), {}),
+            'api:index': (self.authorized_user, reverse('api:index'), {}),
+            'api:post': (
+                self.authorized_user,
+                reverse('api:post', kwargs={'username': user.username,
+                                            'post_id': self.post.id}),
+                {},
+            ),
+        }
+
+    def measure(self):
+        results = {}
+        for name, (client, url, query) in self.requests().items():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, query)
+                elapsed = (time.perf_counter() - start) * 1000
+            self.assertEqual(response.status_code, 200, name)
+            results[name] = (len(queries), elapsed)
+        return results
+
+    def add_content(self):
+        user = self.__class__.user
+        for _ in range(9):
+            post = Post.objects.create(
+                text='кошка', author=user, group=self.group
+            )
+            Comment.objects.create(text='text', post=post, author=user)
+            Comment.objects.create(text='text', post=self.post,
+                                   author=self.reader)
+
+    def test_every_budget_has_a_request(self):
+        self.assertEqual(set(self.requests()), set(VIEW_BUDGETS))
+
+    def test_views_within_budget(self):
+        """Страницы укладываются в бюджет запросов и времени,
+        а число запросов не зависит от числа постов на странице.
+        """
+        single = self.measure()
+        self.add_content()
+        full = self.measure()
+        for name, budget in VIEW_BUDGETS.items():
+            with self.subTest(view=name):
+                queries, elapsed = full[name]
+                self.assertEqual(queries, single[name][0])
+                self.assertLessEqual(queries, budget.queries)
+                self.assertLessEqual(elapsed, budget.ms)
@@ -1,9 +1,16 @@
-from django.test import TestCase, Client
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Post
+from .. import caching
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -21,22 +28,213 @@ class CacheTest(TestCase):
         self.authorized_user.force_login(self.__class__.user)
 
     def test_cache(self):
-        """Тест кэширования главной страницы."""
+        """Тест кэширования главной страницы: пока лента не менялась,
+        страница берётся из кэша, удаление поста сразу её обновляет.
+        """
         user = self.__class__.user
         post = Post.objects.create(
             text='test_text',
             author=user
         )
         index_url = reverse('index')
-        response = self.authorized_user.get(index_url)
+        with CaptureQueriesContext(connection) as first:
+            response = self.authorized_user.get(index_url)
         posts = response.context['page'].object_list
         posts_count = len(posts)
         self.assertIn(post, posts)
+        with CaptureQueriesContext(connection) as second:
+            response = self.authorized_user.get(index_url)
+        self.assertLess(len(second), len(first))
+        self.assertEqual(
+            len(response.context['page'].object_list), posts_count
+        )
         post.delete()
         response = self.authorized_user.get(index_url)
         posts = response.context['page'].object_list
-        self.assertEqual(len(posts), posts_count)
-        cache.clear()
-        response = self.authorized_user.get(index_url)
-        posts = response.context['page'].object_list
         self.assertEqual(len(posts), posts_count - 1)
+
+    def test_cache_refreshes_on_comment(self):
+        """Новый комментарий сразу обновляет счётчик на главной."""
+        user = self.__class__.user
+        post = Post.objects.create(
+            text='test_text',
+            author=user
+        )
+        index_url = reverse('index')
+        response = self.authorized_user.get(index_url)
+        self.assertEqual(
+            response.context['page'].object_list[0].comment_count, 0
+        )
+        Comment.objects.create(text='comment', post=post, author=user)
+        response = self.authorized_user.get(index_url)
+        self.assertEqual(
+            response.context['page'].object_list[0].comment_count, 1
+        )
+
+    def test_unrelated_params_share_cache(self):
+        """Посторонние параметры запроса не создают новых записей кэша."""
+        Post.objects.create(text='test_text', author=self.__class__.user)
+        index_url = reverse('index')
+        with CaptureQueriesContext(connection) as first:
+            self.authorized_user.get(index_url)
+        for params in ({'utm': 'a'}, {'utm': 'b', 'ref': 'mail'}):
+            with CaptureQueriesContext(connection) as other:
+                self.authorized_user.get(index_url, params)
+            self.assertLess(len(other), len(first))
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.another_user = User.objects.create(username='another_user')
+        cls.post = Post.objects.create(text='first_text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.__class__.user)
+        self.another_authorized_user = Client()
+        self.another_authorized_user.force_login(self.__class__.another_user)
+
+    def test_card_cached_until_post_changes(self):
+        """Карточка поста берётся из кэша, пока пост не изменён."""
+        post = self.__class__.post
+        url = reverse('profile', kwargs={'username': self.user.username})
+        self.authorized_user.get(url)
+        Post.objects.filter(pk=post.pk).update(text='silent_update')
+        caching.invalidate(caching.author_tag(post.author_id))
+        response = self.authorized_user.get(url)
+        self.assertContains(response, 'first_text')
+        post.refresh_from_db()
+        post.text = 'second_text'
+        post.save()
+        response = self.authorized_user.get(url)
+        self.assertContains(response, 'second_text')
+
+    def test_card_follows_group_changes(self):
+        """Переименование и удаление группы сразу видны в карточках."""
+        group = Group.objects.create(title='old_title', slug='old-slug')
+        Post.objects.create(text='grouped', author=self.user, group=group)
+        urls = [
+            reverse('index'),
+            reverse('profile', kwargs={'username': self.user.username}),
+        ]
+        for url in urls:
+            self.assertContains(self.authorized_user.get(url), 'old_title')
+        group.title = 'new_title'
+        group.slug = 'new-slug'
+        group.save()
+        for url in urls:
+            response = self.authorized_user.get(url)
+            self.assertContains(response, 'new_title')
+            self.assertContains(response, '/group/new-slug/')
+        group.delete()
+        for url in urls:
+            response = self.authorized_user.get(url)
+            self.assertNotContains(response, 'new_title')
+            self.assertNotContains(response, '/group/new-slug/')
+
+    def test_edit_button_not_cached(self):
+        """Кнопка «Редактировать» видна только автору поста."""
+        url = reverse('index')
+        edit_url = reverse(
+            'post_edit',
+            kwargs={'username': self.user.username,
+                    'post_id': self.post.id}
+        )
+        response = self.authorized_user.get(url)
+        self.assertContains(response, edit_url)
+        response = self.another_authorized_user.get(url)
+        self.assertNotContains(response, edit_url)
+
+
+class StampedeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_single_flight(self):
+        """Одновременные промахи вычисляют значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'page'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                caching.get_or_set('page', ['test'], compute)
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['page'] * 8)
+
+    def test_stale_served_while_refreshing(self):
+        """После инвалидации, пока другой запрос пересчитывает
+        значение, отдаётся прежняя версия.
+        """
+        caching.get_or_set('page', ['test'], lambda: 'old')
+        caching.invalidate('test')
+        key = caching.make_key('page', ['test'])
+        cache.add(f'{key}:lock', 'other', timeout=10)
+        compute = mock.Mock(return_value='new')
+        self.assertEqual(caching.get_or_set('page', ['test'], compute),
+                         'old')
+        compute.assert_not_called()
+        cache.delete(f'{key}:lock')
+        self.assertEqual(caching.get_or_set('page', ['test'], compute),
+                         'new')
+
+    def test_early_recomputation(self):
+        """Близкое к истечению значение пересчитывается заранее
+        одним запросом, остальные получают текущее.
+        """
+        def slow_old():
+            time.sleep(0.05)
+            return 'old'
+
+        caching.get_or_set('page', ['test'], slow_old, timeout=1)
+        key = caching.make_key('page', ['test'])
+        compute = mock.Mock(return_value='new')
+        # random() близко к 1: -log(1 - U) велико, срок «наступил»
+        with mock.patch('random.random', return_value=1 - 1e-12):
+            cache.add(f'{key}:lock', 'other', timeout=10)
+            self.assertEqual(
+                caching.get_or_set('page', ['test'], compute, timeout=1),
+                'old'
+            )
+            compute.assert_not_called()
+            cache.delete(f'{key}:lock')
+            self.assertEqual(
+                caching.get_or_set('page', ['test'], compute, timeout=1),
+                'new'
+            )
+        compute.assert_called_once()
+
+
+class StaleResponseTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_stale_page_not_stored(self):
+        """Страницу из прежней версии кэша браузер не сохраняет."""
+        user = User.objects.create(username='test_user')
+        Post.objects.create(text='first', author=user)
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotIn('no-store', response.get('Cache-Control', ''))
+        Post.objects.create(text='second', author=user)
+        key = caching.make_key('posts-index-page-', [caching.FEED_TAG])
+        cache.add(f'{key}:lock', 'other', timeout=10)
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'second')
+        self.assertIn('no-store', response['Cache-Control'])
@@ -3,7 +3,8 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.cache import cache
 
-from ..models import Post
+from ..models import Comment, Post
+from ..pagination import COMMENTS_PER_PAGE
 
 User = get_user_model()
 
@@ -55,3 +56,51 @@ class CommentTest(TestCase):
             follow=True
         )
         self.assertRedirects(response, post_url)
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.post = Post.objects.create(text='test_text', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(text=f'comment {i}', post=cls.post, author=cls.user)
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_page_shows_first_comments(self):
+        """На странице поста только первая порция комментариев
+        и ссылка на подгрузку следующей.
+        """
+        user = self.__class__.user
+        response = self.guest_client.get(reverse(
+            'post', kwargs={'username': user.username,
+                            'post_id': self.post.id}
+        ))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text, 'comment 0')
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'js-more-comments')
+
+    def test_fragment_continues_after_cursor(self):
+        user = self.__class__.user
+        kwargs = {'username': user.username, 'post_id': self.post.id}
+        first = self.guest_client.get(reverse('post', kwargs=kwargs))
+        response = self.guest_client.get(
+            reverse('post_comments', kwargs=kwargs),
+            {'after': first.context['comments'].next_cursor}
+        )
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         [f'comment {i}' for i in range(
+                             COMMENTS_PER_PAGE, COMMENTS_PER_PAGE + 5)])
+        self.assertFalse(comments.has_next())
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'js-more-comments')
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.another_user = User.objects.create(username='another_user')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description'
+        )
+        cls.post = Post.objects.create(
+            text='test_text', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.__class__.another_user)
+
+    def urls(self):
+        user = self.__class__.user
+        return [
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': user.username}),
+            reverse('post', kwargs={'username': user.username,
+                                    'post_id': self.post.id}),
+        ]
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                response = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_invalidate_etag(self):
+        """Комментарий, удаление поста и подписка меняют ETag."""
+        user = self.__class__.user
+        urls = self.urls()
+        first = {url: self.guest_client.get(url) for url in urls}
+        Comment.objects.create(text='comment', post=self.post, author=user)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.guest_client, url,
+                                           first[url])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        profile_url = urls[2]
+        response = self.authorized_user.get(profile_url)
+        Follow.objects.create(user=self.another_user, author=user)
+        response = self.revalidate(self.authorized_user, profile_url,
+                                   response)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        index_url = urls[0]
+        other = Post.objects.create(text='other', author=self.another_user)
+        response = self.guest_client.get(index_url)
+        other.delete()
+        response = self.revalidate(self.guest_client, index_url, response)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_viewer(self):
+        """Разные пользователи получают разные ETag."""
+        url = reverse('index')
+        guest = self.guest_client.get(url)
+        response = self.revalidate(self.authorized_user, url, guest)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_other_worker_changes(self):
+        """
+        Без общего кэша ETag считается по БД: запись, о которой этот
+        процесс не узнал (без сигналов), тоже меняет валидатор.
+        """
+        urls = self.urls()
+        first = {url: self.guest_client.get(url) for url in urls}
+        Post.objects.bulk_create([Post(text='elsewhere', author=self.user,
+                                       group=self.group)])
+        Comment.objects.bulk_create([Comment(text='elsewhere',
+                                             post=self.post,
+                                             author=self.another_user)])
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.guest_client, url,
+                                           first[url])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(POSTS_SHARED_CACHE=True)
+    def test_shared_cache_versions(self):
+        """С общим кэшем ETag строится по версиям тегов."""
+        url = reverse('index')
+        response = self.guest_client.get(url)
+        response = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(text='comment', post=self.post,
+                               author=self.user)
+        response = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.another_user = User.objects.create(username='another_test_user')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик записей меняется при создании и удалении поста."""
+        user = self.__class__.user
+        post = Post.objects.create(text='test_text', author=user)
+        Post.objects.create(text='test_text', author=user)
+        self.assertEqual(self.stats(user).posts_count, 2)
+        post.delete()
+        self.assertEqual(self.stats(user).posts_count, 1)
+
+    def test_follow_counters(self):
+        """Счётчики подписчиков и подписок меняются при подписке
+        и отписке.
+        """
+        user = self.__class__.user
+        another_user = self.__class__.another_user
+        follow = Follow.objects.create(user=user, author=another_user)
+        self.assertEqual(self.stats(another_user).followers_count, 1)
+        self.assertEqual(self.stats(user).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(another_user).followers_count, 0)
+        self.assertEqual(self.stats(user).following_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters восстанавливает счётчики."""
+        user = self.__class__.user
+        another_user = self.__class__.another_user
+        Post.objects.create(text='test_text', author=user)
+        Follow.objects.create(user=another_user, author=user)
+        UserStats.objects.all().delete()
+        UserStats.objects.create(user=another_user, following_count=5)
+        call_command('reconcile_counters', stdout=StringIO())
+        stats = self.stats(user)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(self.stats(another_user).following_count, 1)
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.another_user = User.objects.create(username='another_user')
+        cls.post = Post.objects.create(text='test_text', author=cls.user)
+        Comment.objects.create(text='comment', post=cls.post,
+                               author=cls.user)
+        cls.foreign = Post.objects.create(text='foreign',
+                                          author=cls.another_user)
+        Comment.objects.create(text='foreign comment', post=cls.foreign,
+                               author=cls.user)
+
+    def setUp(self):
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.__class__.user)
+        self.url = reverse('profile_export',
+                           kwargs={'username': self.user.username})
+
+    def test_export_ndjson(self):
+        """Выгрузка NDJSON отдаётся потоком и содержит только
+        записи автора.
+        """
+        response = self.authorized_user.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual([record['type'] for record in records],
+                         ['post', 'comment', 'comment'])
+        self.assertEqual(records[0]['text'], 'test_text')
+        self.assertEqual(records[1]['post'], self.post.id)
+        self.assertNotIn('post', records[2])
+        self.assertEqual(records[2]['post_url'], reverse('post', kwargs={
+            'username': self.another_user.username,
+            'post_id': self.foreign.id,
+        }))
+
+    def test_export_csv(self):
+        response = self.authorized_user.get(self.url, {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['text'], 'test_text')
+        self.assertTrue(rows[2]['post_url'])
+
+    def test_export_only_own_content(self):
+        """Чужую выгрузку получить нельзя."""
+        client = Client()
+        client.force_login(self.__class__.another_user)
+        response = client.get(self.url)
+        self.assertRedirects(
+            response,
+            reverse('profile', kwargs={'username': self.user.username})
+        )
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_user', self.user.username, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+    def test_export_reimports(self):
+        """Выгрузка загружается обратно: комментарий попадает
+        к копии своего поста, комментарий к чужому — к тому же посту.
+        """
+        out = io.StringIO()
+        call_command('export_user', self.user.username, stdout=out)
+        path = os.path.join(tempfile.mkdtemp(), 'export.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(out.getvalue())
+        call_command('import_feed', path, stdout=io.StringIO())
+        copy = Post.objects.filter(text='test_text').latest('id')
+        self.assertNotEqual(copy, self.post)
+        self.assertEqual(copy.comments.get().text, 'comment')
+        self.assertEqual(
+            list(self.foreign.comments.values_list('text', flat=True)),
+            ['foreign comment', 'foreign comment'],
+        )
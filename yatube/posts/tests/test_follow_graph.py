@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import caching, follow_graph, timeline
+from ..models import Follow
+
+User = get_user_model()
+
+
+@override_settings(POSTS_SHARED_CACHE=True)
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.reader = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author_{i}') for i in range(3)
+        ]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.__class__.reader)
+
+    def test_answers_from_memory_after_load(self):
+        """После загрузки графа проверки подписок не ходят в БД."""
+        reader, authors = self.__class__.reader, self.__class__.authors
+        self.assertEqual(follow_graph.load(), 2)
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(reader.id,
+                                                      authors[0].id))
+            self.assertFalse(follow_graph.is_following(reader.id,
+                                                       authors[2].id))
+            self.assertEqual(list(follow_graph.following(reader.id)),
+                             sorted(author.id for author in authors[:2]))
+
+    def test_full_load_without_in_list(self):
+        """Весь граф читается без списка id в запросе, версии тегов —
+        пачками по LOAD_CHUNK.
+        """
+        reader, authors = self.__class__.reader, self.__class__.authors
+        for author in authors[:2]:
+            Follow.objects.create(user=author, author=authors[2])
+        tag_version_map = caching.tag_version_map
+        chunks = []
+
+        def record_chunk(tags):
+            tags = list(tags)
+            chunks.append(len(tags))
+            return tag_version_map(tags)
+
+        with mock.patch.object(follow_graph, 'LOAD_CHUNK', 2), \
+                mock.patch.object(caching, 'tag_version_map',
+                                  record_chunk), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(follow_graph.load(), 4)
+        self.assertEqual(chunks, [2, 1])
+        for query in queries:
+            self.assertNotIn(' IN (', query['sql'])
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(authors[0].id,
+                                                      authors[2].id))
+            self.assertEqual(len(follow_graph.following(reader.id)), 2)
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Подписка и отписка через представления видны сразу."""
+        reader, author = self.__class__.reader, self.__class__.authors[2]
+        follow_graph.load()
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': author.username})
+        )
+        self.assertTrue(follow_graph.is_following(reader.id, author.id))
+        self.reader_client.get(
+            reverse('profile_unfollow', kwargs={'username': author.username})
+        )
+        self.assertFalse(follow_graph.is_following(reader.id, author.id))
+
+    def test_user_without_follows(self):
+        author = self.__class__.authors[2]
+        self.assertEqual(len(follow_graph.following(author.id)), 0)
+        with self.assertNumQueries(0):
+            self.assertFalse(follow_graph.is_following(author.id,
+                                                       self.reader.id))
+
+    def test_follow_feed_uses_loaded_graph(self):
+        """Лента подписок с загруженным графом не обращается к Follow,
+        без графа — берёт подписки подзапросом.
+        """
+        reader = self.__class__.reader
+
+        def celebrity_sql():
+            return str(timeline.celebrity_ids(reader).query)
+
+        self.assertIn('posts_follow', celebrity_sql())
+        follow_graph.load()
+        self.assertNotIn('posts_follow', celebrity_sql())
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(POSTS_SHARED_CACHE=False)
+    def test_process_local_cache_reads_database(self):
+        """С кэшем на процесс граф не используется: подписку из
+        другого воркера (без сдвига тега здесь) видно сразу.
+        """
+        reader, author = self.__class__.reader, self.__class__.authors[2]
+        self.assertEqual(follow_graph.load(), 0)
+        self.assertFalse(follow_graph.is_following(reader.id, author.id))
+        Follow.objects.bulk_create([Follow(user=reader, author=author)])
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.is_following(reader.id, author.id))
+        self.assertIsNone(follow_graph.following(reader.id,
+                                                 load_missing=False))
+        self.assertIn('posts_follow',
+                      str(timeline.celebrity_ids(reader).query))
@@ -95,7 +95,7 @@ class PostFormTest(TestCase):
             Post.objects.filter(
                 author=user,
                 text=text,
-                image='posts/image.gif',
+                image='posts/image.webp',
                 group__isnull=True
             ).exists()
         )
@@ -0,0 +1,79 @@
+import io
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from PIL import Image
+
+from .. import images
+from ..forms import PostForm
+
+
+def make_upload(size, fmt='JPEG', name='photo.jpg', **save_kwargs):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, fmt, **save_kwargs)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type=f'image/{fmt.lower()}')
+
+
+class ProcessUploadTest(TestCase):
+    def test_downscale_and_reencode(self):
+        """Большой JPEG уменьшается и сохраняется как WEBP."""
+        result = images.process_upload(make_upload((4000, 3000)))
+        self.assertEqual(result.name, 'photo.webp')
+        image = Image.open(io.BytesIO(result.read()))
+        self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(max(image.size), images.POST_IMAGE_MAX_SIDE)
+        self.assertEqual(image.size, (1920, 1440))
+
+    def test_small_image_not_upscaled(self):
+        result = images.process_upload(make_upload((300, 200)))
+        self.assertEqual(Image.open(result).size, (300, 200))
+
+    def test_exif_stripped(self):
+        """Метаданные исходника в файл не попадают, ориентация
+        применяется к пикселям.
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повернуть на 90°
+        exif[0x010F] = 'Camera maker'
+        upload = make_upload((400, 200), exif=exif.tobytes())
+        image = Image.open(images.process_upload(upload))
+        self.assertEqual(image.size, (200, 400))
+        self.assertEqual(len(image.getexif()), 0)
+        self.assertNotIn('exif', image.info)
+
+    def test_decompression_bomb_rejected(self):
+        with mock.patch.object(images, 'POST_IMAGE_MAX_PIXELS', 100 * 100):
+            with self.assertRaises(ValidationError):
+                images.process_upload(make_upload((200, 200)))
+
+    def test_form_rejects_bomb(self):
+        with mock.patch.object(images, 'POST_IMAGE_MAX_PIXELS', 100 * 100):
+            form = PostForm(
+                data={'text': 'text'},
+                files={'image': make_upload((200, 200))},
+            )
+            self.assertFalse(form.is_valid())
+            self.assertIn('image', form.errors)
+
+    def test_truncated_image_rejected(self):
+        """Обрезанный JPEG — ошибка формы, а не 500."""
+        buffer = io.BytesIO()
+        Image.effect_noise((400, 300), 64).convert('RGB').save(buffer,
+                                                               'JPEG')
+        content = buffer.getvalue()
+        # обрезаны заголовок и данные пикселей после целого заголовка
+        for size in (400, len(content) // 2):
+            with self.subTest(size=size):
+                upload = SimpleUploadedFile('photo.jpg', content[:size],
+                                            content_type='image/jpeg')
+                with self.assertRaises(ValidationError):
+                    images.process_upload(upload)
+                upload.seek(0)
+                form = PostForm(data={'text': 'text'},
+                                files={'image': upload})
+                self.assertFalse(form.is_valid())
+                self.assertIn('image', form.errors)
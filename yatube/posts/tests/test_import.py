@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..importer import FeedImporter
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class ImportFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+
+    def write(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        )
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_import_jsonl(self):
+        """Импорт JSONL создаёт записи с исходными датами,
+        пересчитывает счётчики и ленты.
+        """
+        records = [
+            {'type': 'group', 'slug': 'cats', 'title': 'Кошки'},
+            {'type': 'post', 'ref': 'p1', 'author': 'test_user',
+             'group': 'cats', 'text': 'Первый пост',
+             'pub_date': '2020-01-01T10:00:00+00:00'},
+            {'type': 'post', 'ref': 'p2', 'author': 'new_author',
+             'text': 'Второй пост'},
+            {'type': 'comment', 'post': 'p1', 'author': 'new_author',
+             'text': 'Комментарий'},
+            {'type': 'follow', 'user': 'reader', 'author': 'test_user'},
+        ]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(row) for row in records)
+        )
+        out = StringIO()
+        call_command('import_feed', path, batch_size=2, stdout=out)
+        self.assertIn('строк/с', out.getvalue())
+
+        post = Post.objects.get(text='Первый пост')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(Comment.objects.get().post, post)
+        reader = User.objects.get(username='reader')
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=self.user).exists()
+        )
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count,
+                         1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).followers_count, 1
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists()
+        )
+
+    def test_import_csv(self):
+        """Импорт CSV с типом записей из параметра --type."""
+        path = self.write(
+            '.csv', 'author,text\ntest_user,первый\ntest_user,второй\n'
+        )
+        call_command('import_feed', path, type='post', stdout=StringIO())
+        self.assertEqual(self.user.posts.count(), 2)
+
+    def test_comment_posts_resolved_explicitly(self):
+        """Комментарий привязывается к ref из файла или к явному
+        post_id; число в post не считается id поста из базы.
+        """
+        post = Post.objects.create(text='existing', author=self.user)
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'comment', 'post_id': post.id, 'author': 'test_user',
+             'text': 'Комментарий'}
+        ))
+        call_command('import_feed', path, stdout=StringIO())
+        self.assertEqual(Comment.objects.get().post, post)
+
+        for row in ({'post': post.id}, {'post_id': post.id + 100}):
+            with self.subTest(row=row):
+                path = self.write('.jsonl', json.dumps(
+                    {'type': 'comment', 'author': 'test_user',
+                     'text': 'Лишний', **row}
+                ))
+                with self.assertRaises(CommandError):
+                    call_command('import_feed', path, stdout=StringIO())
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_comment_post_url(self):
+        """Комментарий с post_url привязывается к посту с тем же id
+        и автором; если такого нет, он пропускается.
+        """
+        post = Post.objects.create(text='existing', author=self.user)
+        rows = [
+            {'post_url': f'/test_user/{post.id}/', 'text': 'Найден'},
+            {'post_url': f'/another_user/{post.id}/', 'text': 'Чужой'},
+            {'post_url': f'/test_user/{post.id + 100}/', 'text': 'Удалён'},
+        ]
+        path = self.write('.jsonl', '\n'.join(
+            json.dumps({'type': 'comment', 'author': 'test_user', **row})
+            for row in rows
+        ))
+        out = StringIO()
+        call_command('import_feed', path, stdout=out)
+        self.assertEqual(Comment.objects.get().text, 'Найден')
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertIn('пропущено комментариев к постам, которых нет '
+                      'в базе: 2', out.getvalue())
+
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'comment', 'author': 'test_user', 'text': 'Плохой',
+             'post_url': '/group/test/'}
+        ))
+        with self.assertRaises(CommandError):
+            call_command('import_feed', path, stdout=StringIO())
+
+    def test_post_ids_reserved(self):
+        """Пост, созданный на сайте посреди импорта, не конфликтует
+        с id импортируемых постов.
+        """
+        records = [
+            {'type': 'post', 'ref': f'p{i}', 'author': 'test_user',
+             'text': f'Пост {i}'}
+            for i in range(4)
+        ] + [{'type': 'comment', 'post': 'p0', 'author': 'test_user',
+              'text': 'Комментарий'}]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(row) for row in records)
+        )
+        flush_posts = FeedImporter._flush_posts
+
+        def flush_then_post(importer):
+            flush_posts(importer)
+            Post.objects.create(text='С сайта', author=self.user)
+
+        with mock.patch.object(FeedImporter, '_flush_posts',
+                               flush_then_post):
+            call_command('import_feed', path, batch_size=2,
+                         stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 4 + 3)
+        self.assertEqual(Comment.objects.get().post.text, 'Пост 0')
+
+    def test_conflict_reported(self):
+        """IntegrityError при вставке — ошибка команды с числом уже
+        записанных строк.
+        """
+        path = self.write('.jsonl', '\n'.join(
+            json.dumps({'type': 'post', 'author': 'test_user',
+                        'text': f'Пост {i}'})
+            for i in range(3)
+        ))
+        taken = Post.objects.create(text='Занят', author=self.user)
+        with mock.patch('posts.importer.reserve_post_ids',
+                        side_effect=[[taken.id + 1, taken.id + 2],
+                                     [taken.id]]):
+            with self.assertRaisesMessage(CommandError,
+                                          'Записано до ошибки: 2'):
+                call_command('import_feed', path, batch_size=2,
+                             stdout=StringIO())
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count,
+                         3)
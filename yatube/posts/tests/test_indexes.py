@@ -0,0 +1,114 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from .. import timeline
+from ..api import POST_FIELDS
+from ..models import Comment, Follow, Group, Post
+from ..pagination import (POSTS_PER_PAGE, CursorPaginator,
+                          comments_paginator, encode_cursor)
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite',
+            'EXPLAIN QUERY PLAN есть только в SQLite')
+class QueryPlanTest(TestCase):
+    """Горячие запросы лент идут по составным индексам
+    и не сортируют выборку во временном B-tree.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.group = Group.objects.create(title='Test group', slug='test')
+        cls.post = Post.objects.create(text='test_text', author=cls.user,
+                                       group=cls.group)
+        Comment.objects.create(text='comment', post=cls.post,
+                               author=cls.user)
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.plan(queryset)
+        self.assertIn(f'INDEX {index}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotIn('MULTI-INDEX OR', plan)
+
+    def assertPagesUseIndex(self, queryset, index):
+        """Первая страница и страницы по курсору в обе стороны."""
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE)
+        token = encode_cursor([self.post.pub_date, self.post.id])
+        for cursor in ({}, {'after': token}, {'before': token}):
+            with self.subTest(cursor=cursor):
+                page_query, _ = paginator.page_query(**cursor)
+                self.assertUsesIndex(page_query, index)
+
+    def test_profile_feed(self):
+        self.assertPagesUseIndex(self.user.posts.for_feed(),
+                                 'post_author_date_idx')
+
+    def test_group_feed(self):
+        self.assertPagesUseIndex(self.group.posts.for_feed(),
+                                 'post_group_date_idx')
+
+    def test_index_feed(self):
+        self.assertPagesUseIndex(Post.objects.for_feed(), 'post_date_idx')
+
+    def test_api_feed(self):
+        self.assertPagesUseIndex(
+            Post.objects.for_feed().values(*POST_FIELDS), 'post_date_idx'
+        )
+
+    def test_post_comments(self):
+        self.assertUsesIndex(
+            self.post.comments.select_related('author').order_by('created'),
+            'comment_post_created_idx'
+        )
+
+    def test_comment_pages(self):
+        """«Загрузить ещё» начинает чтение индекса с курсора,
+        а не с первого комментария поста.
+        """
+        comment = self.post.comments.get()
+        page_query, _ = comments_paginator(self.post).page_query(
+            after=encode_cursor([comment.created, comment.id])
+        )
+        self.assertUsesIndex(page_query, 'comment_post_created_idx')
+        self.assertIn('(post_id=? AND created>?)', self.plan(page_query))
+
+    def test_follow_feed(self):
+        """Материализованная лента читается диапазоном индекса
+        и с курсором, без MULTI-INDEX OR и сортировки.
+        """
+        for cursor in (None, (self.post.pub_date, self.post.id)):
+            for forward in (True, False):
+                with self.subTest(cursor=cursor, forward=forward):
+                    plan = self.plan(timeline.entry_posts(
+                        self.user, Post.objects.for_feed(), cursor, forward
+                    ))
+                    self.assertIn('INDEX timeline_user_date_idx', plan)
+                    self.assertNotIn('MULTI-INDEX OR', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_lookup(self):
+        plan = self.plan(Follow.objects.filter(user=self.user,
+                                               author=self.user))
+        self.assertIn('(user_id=? AND author_id=?)', plan)
+
+
+class FollowUniqueTest(TestCase):
+    def test_duplicate_follow_rejected(self):
+        user = User.objects.create(username='follower')
+        author = User.objects.create(username='author')
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=author)
@@ -0,0 +1,98 @@
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.core.cache import cache
+
+from ..models import Post
+from ..pagination import (CursorPage, CursorPaginator, decode_cursor,
+                          encode_cursor)
+
+User = get_user_model()
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        for number in range(23):
+            Post.objects.create(text=f'post {number}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_roundtrip(self):
+        """Токен курсора обратимо кодирует пару (дата, id)."""
+        post = Post.objects.first()
+        token = encode_cursor([post.pub_date, post.id])
+        self.assertEqual(decode_cursor(token), (post.pub_date, post.id))
+        self.assertIsNone(decode_cursor('broken-token'))
+        self.assertIsNone(decode_cursor(encode_cursor(['x', 1])))
+
+    def test_cursor_page_has_no_numbers(self):
+        """Номера и позиции курсорной страницы — None, а не ошибка."""
+        page = CursorPaginator(Post.objects.all(), 10).get_cursor_page()
+        for method in (page.next_page_number, page.previous_page_number,
+                       page.start_index, page.end_index):
+            self.assertIsNone(method())
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_garbage_cursor_opens_first_page(self):
+        """Токен с мусором вместо даты открывает первую страницу."""
+        token = encode_cursor(['x', 1])
+        urls = [
+            reverse('index'),
+            reverse('profile', kwargs={'username': self.user.username}),
+            reverse('api:index'),
+        ]
+        for url in urls:
+            for param in ('after', 'before'):
+                with self.subTest(url=url, param=param):
+                    response = self.guest_client.get(url, {param: token})
+                    self.assertEqual(response.status_code, 200)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_walks_all_posts(self):
+        """Переход по ссылкам «старее» выдаёт все посты ровно один раз,
+        а «новее» возвращает на предыдущую страницу.
+        """
+        url = reverse('index')
+        response = self.guest_client.get(url)
+        page = response.context['page']
+        self.assertIsInstance(page, CursorPage)
+        pages = [page]
+        while page.has_next():
+            cache.clear()
+            response = self.guest_client.get(
+                url, {'after': page.next_cursor}
+            )
+            page = response.context['page']
+            pages.append(page)
+
+        seen = [post.id for page in pages for post in page.object_list]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 3])
+
+        cache.clear()
+        response = self.guest_client.get(
+            url, {'before': pages[2].previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page'].object_list),
+            list(pages[1].object_list)
+        )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_numbered_links_still_work(self):
+        """Старые ссылки ?page=N работают и в курсорном режиме."""
+        link = reverse('profile', kwargs={'username': self.user.username})
+        response = self.guest_client.get(link, {'page': 3})
+        page = response.context['page']
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page.object_list), 3)
@@ -0,0 +1,106 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import rollups
+from ..models import Group, GroupAuthorStats, GroupStats, Post
+
+User = get_user_model()
+
+
+def snapshot():
+    return (
+        sorted(GroupStats.objects.values_list(
+            'group_id', 'posts_count', 'last_post_at'
+        )),
+        sorted(GroupAuthorStats.objects.values_list(
+            'group_id', 'author_id', 'posts_count'
+        )),
+    )
+
+
+class GroupRollupsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.another_user = User.objects.create(username='another_user')
+        cls.group = Group.objects.create(title='Cats', slug='cats',
+                                         description='about cats')
+        cls.another_group = Group.objects.create(title='Dogs', slug='dogs',
+                                                 description='about dogs')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_incremental_matches_rebuild(self):
+        """Сводки, обновлённые сигналами, совпадают с пересборкой."""
+        posts = [
+            Post.objects.create(text='text', author=author, group=self.group)
+            for author in (self.user, self.user, self.another_user)
+        ]
+        Post.objects.create(text='text', author=self.user)
+        moved = posts[1]
+        moved.group = self.another_group
+        moved.save()
+        posts[2].delete()
+
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_at, posts[0].pub_date)
+        self.assertFalse(GroupAuthorStats.objects.filter(
+            group=self.group, author=self.another_user
+        ).exists())
+        incremental = snapshot()
+        rollups.rebuild()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_empty_group_listed(self):
+        group = Group.objects.create(title='Empty', slug='empty')
+        self.assertEqual(GroupStats.objects.get(group=group).posts_count, 0)
+
+    def test_directory_page(self):
+        for author in (self.user, self.user, self.another_user):
+            Post.objects.create(text='text', author=author, group=self.group)
+        response = self.guest_client.get(reverse('groups'))
+        groups = list(response.context['page'])
+        self.assertEqual([group['slug'] for group in groups],
+                         ['cats', 'dogs'])
+        self.assertEqual(groups[0]['posts_count'], 3)
+        self.assertEqual(groups[0]['top_authors'], [
+            {'username': 'test_user', 'posts_count': 2},
+            {'username': 'another_user', 'posts_count': 1},
+        ])
+        self.assertContains(response, '@test_user')
+
+    def test_directory_json(self):
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        response = self.guest_client.get(reverse('api:groups'))
+        data = json.loads(response.content)
+        self.assertEqual(data['results'][0]['slug'], 'cats')
+        self.assertEqual(data['results'][0]['posts_count'], 1)
+        self.assertEqual(data['pages'], 1)
+
+    def test_directory_refreshes_after_post(self):
+        self.guest_client.get(reverse('groups'))
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        response = self.guest_client.get(reverse('groups'))
+        self.assertEqual(response.context['page'][0]['posts_count'], 1)
+
+    def test_rebuild_command(self):
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        GroupStats.objects.all().delete()
+        GroupAuthorStats.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_group_stats', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 1
+        )
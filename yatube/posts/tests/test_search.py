@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..admin import PostAdmin
+from ..models import Post
+from ..search import match_expression
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.cat_post = Post.objects.create(
+            text='Кошка спит на подоконнике', author=cls.user
+        )
+        cls.dog_post = Post.objects.create(
+            text='Собака гоняет кошку по двору', author=cls.user
+        )
+        cls.other_post = Post.objects.create(
+            text='Про погоду', author=cls.user
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        return list(response.context['page'].object_list)
+
+    def test_match_expression(self):
+        """Спецсимволы запроса не попадают в выражение MATCH."""
+        self.assertEqual(match_expression('кошка "OR* ('), '"кошка" "OR"*')
+        self.assertEqual(match_expression('!!!'), '')
+
+    def test_search_finds_posts(self):
+        """Поиск находит посты по словам и префиксам."""
+        self.assertEqual(self.search('спит'), [self.cat_post])
+        self.assertCountEqual(
+            self.search('кош'), [self.cat_post, self.dog_post]
+        )
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('???'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется триггерами при правке и удалении."""
+        post = self.other_post
+        post.text = 'Про дождь'
+        post.save()
+        self.assertEqual(self.search('погоду'), [])
+        self.assertEqual(self.search('дождь'), [post])
+        post.delete()
+        self.assertEqual(self.search('дождь'), [])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        admin = PostAdmin(Post, None)
+        queryset, use_distinct = admin.get_search_results(
+            None, Post.objects.all(), 'подоконнике'
+        )
+        self.assertFalse(use_distinct)
+        self.assertEqual(list(queryset), [self.cat_post])
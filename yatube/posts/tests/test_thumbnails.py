@@ -0,0 +1,57 @@
+import shutil
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+
+from ..models import Post
+from ..thumbnails import POST_THUMBNAIL_GEOMETRY, POST_THUMBNAIL_OPTIONS
+
+User = get_user_model()
+
+TEST_DIR = 'test_data'
+
+
+@override_settings(MEDIA_ROOT=(TEST_DIR + '/media'))
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        image = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            text='post with image',
+            author=cls.user,
+            image=SimpleUploadedFile(name='image.gif', content=image,
+                                     content_type='image/gif'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_DIR)
+        super().tearDownClass()
+
+    def test_warm_thumbnails_command(self):
+        """Команда warm_thumbnails создаёт миниатюру, которую затем
+        найдёт тег {% thumbnail %}.
+        """
+        default.kvstore.clear()
+        out = StringIO()
+        call_command('warm_thumbnails', workers=0, stdout=out)
+        self.assertIn('готово: 1', out.getvalue())
+        thumbnail = default.backend.get_thumbnail(
+            self.post.image, POST_THUMBNAIL_GEOMETRY,
+            **POST_THUMBNAIL_OPTIONS
+        )
+        self.assertTrue(thumbnail.exists())
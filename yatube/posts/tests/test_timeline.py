@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.author = User.objects.create(username='author')
+        cls.old_post = Post.objects.create(text='old', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.__class__.user)
+
+    def feed(self):
+        response = self.authorized_user.get(reverse('follow_index'))
+        return list(response.context['page'].object_list)
+
+    def test_fan_out_on_write(self):
+        """Подписка копирует старые посты автора в ленту,
+        новый пост раскладывается по лентам, отписка их убирает.
+        """
+        user = self.__class__.user
+        author = self.__class__.author
+        Follow.objects.create(user=user, author=author)
+        new_post = Post.objects.create(text='new', author=author)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=user)
+                .values_list('post_id', flat=True)),
+            {self.old_post.id, new_post.id}
+        )
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        Follow.objects.filter(user=user, author=author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_popular_authors_merged_on_read(self):
+        """Посты популярных авторов не раскладываются по лентам,
+        но попадают в ленту при чтении.
+        """
+        user = self.__class__.user
+        author = self.__class__.author
+        Follow.objects.create(user=user, author=author)
+        new_post = Post.objects.create(text='new', author=author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_backfill_and_trim_commands(self):
+        """Команды перестраивают и обрезают ленты."""
+        user = self.__class__.user
+        author = self.__class__.author
+        Follow.objects.create(user=user, author=author)
+        Post.objects.create(text='new', author=author)
+        TimelineEntry.objects.all().delete()
+        call_command('timeline_backfill', stdout=StringIO())
+        self.assertEqual(TimelineEntry.objects.filter(user=user).count(), 2)
+        call_command('timeline_trim', keep=1, stdout=StringIO())
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post__text', flat=True)),
+            ['new']
+        )
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1,
+                       POSTS_CURSOR_PAGINATION=True)
+    def test_pages_merge_both_sources(self):
+        """Страницы ленты сливают разложенные посты и посты популярных
+        авторов без пропусков и повторов в обе стороны.
+        """
+        user = self.__class__.user
+        author = self.__class__.author
+        celebrity = User.objects.create(username='celebrity')
+        fan = User.objects.create(username='fan')
+        Follow.objects.create(user=fan, author=celebrity)
+        Follow.objects.create(user=user, author=celebrity)
+        Follow.objects.create(user=user, author=author)
+        for number in range(12):
+            Post.objects.create(text=f'post {number}',
+                                author=(author, celebrity)[number % 2])
+        expected = list(
+            Post.objects.filter(author__in=[author, celebrity])
+            .order_by('-pub_date', '-id')
+        )
+
+        url = reverse('follow_index')
+        pages = [self.authorized_user.get(url).context['page']]
+        while pages[-1].has_next():
+            response = self.authorized_user.get(
+                url, {'after': pages[-1].next_cursor}
+            )
+            pages.append(response.context['page'])
+        self.assertEqual(
+            [post for page in pages for post in page.object_list], expected
+        )
+        response = self.authorized_user.get(
+            url, {'before': pages[1].previous_cursor}
+        )
+        self.assertEqual(list(response.context['page'].object_list),
+                         list(pages[0].object_list))
+        response = self.authorized_user.get(url, {'page': 2})
+        self.assertEqual(response.context['page'].paginator.count, 13)
+        self.assertEqual(list(response.context['page'].object_list),
+                         expected[10:])
@@ -8,9 +8,11 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from ..forms import PostForm
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -329,3 +331,53 @@ class PaginatorViewsTest(TestCase):
         )
         response = self.authorized_user.get(link)
         self.assertEqual(len(response.context.get('page').object_list), 10)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='test_user')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='test_description'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_user = Client()
+        self.authorized_user.force_login(FeedQueriesTest.user)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_user.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_feed_queries_do_not_depend_on_page_size(self):
+        """Число запросов ленты не растёт вместе с числом постов
+        на странице.
+        """
+        user = FeedQueriesTest.user
+        group = FeedQueriesTest.group
+        Follow.objects.create(
+            user=User.objects.create(username='follower'),
+            author=user
+        )
+        urls = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': group.slug}),
+            reverse('profile', kwargs={'username': user.username}),
+        ]
+        post = Post.objects.create(text='text', author=user, group=group)
+        Comment.objects.create(text='comment', post=post, author=user)
+        single = {url: self.count_queries(url) for url in urls}
+        for _ in range(9):
+            post = Post.objects.create(text='text', author=user, group=group)
+            Comment.objects.create(text='comment', post=post, author=user)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
@@ -0,0 +1,73 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Должны совпадать с тегом {% thumbnail %} в post_item.html,
+# иначе sorl сгенерирует при рендере другую миниатюру.
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    # соединения, унаследованные через fork, дочернему процессу не годятся
+    connections.close_all()
+
+
+def generate(name):
+    """
+    Генерирует миниатюру поста для изображения name из MEDIA_ROOT.
+    Уже созданные миниатюры sorl находит в KV-хранилище и не пересчитывает.
+    """
+    get_thumbnail(name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS)
+    return name
+
+
+def executor(workers=None):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers or settings.POSTS_THUMBNAIL_WORKERS,
+            initializer=init_worker,
+        )
+    return _executor
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error('Thumbnail generation failed: %s', error)
+
+
+def _shared_database():
+    """
+    Дочерние процессы не видят базу в памяти (например, тестовую).
+    """
+    return not (connection.vendor == 'sqlite'
+                and connection.is_in_memory_db())
+
+
+def schedule(name):
+    """
+    Ставит генерацию миниатюры в пул процессов.
+    При POSTS_THUMBNAIL_WORKERS = 0 генерирует её сразу.
+    """
+    if settings.POSTS_THUMBNAIL_WORKERS and _shared_database():
+        executor().submit(generate, name).add_done_callback(_log_failure)
+        return
+    try:
+        generate(name)
+    except Exception as error:
+        logger.error('Thumbnail generation failed: %s', error)
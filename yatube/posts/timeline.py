@@ -0,0 +1,251 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .pagination import (POSTS_PER_PAGE, CursorPaginator, cursor_filter,
+                         decode_cursor, use_cursor)
+from . import follow_graph
+
+FANOUT_BATCH_SIZE = 500
+# Длиннее список подписок не подставляем в IN, а берём подзапросом
+FOLLOWING_IN_LIMIT = 500
+
+
+def fanout_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 1000)
+
+
+def max_entries():
+    return getattr(settings, 'TIMELINE_MAX_ENTRIES', 1000)
+
+
+def is_celebrity(author_id):
+    """
+    Авторов с числом подписчиков выше порога не раскладываем по лентам:
+    их посты подмешиваются при чтении.
+    """
+    return UserStats.objects.filter(
+        user_id=author_id, followers_count__gt=fanout_threshold()
+    ).exists()
+
+
+def fan_out(post):
+    """
+    Раскладывает новый пост по лентам подписчиков автора.
+    """
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator():
+        batch.append(TimelineEntry(user_id=user_id, post_id=post.id,
+                                   pub_date=post.pub_date))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _fill(user_id, author_ids, limit):
+    posts = Post.objects.filter(author_id__in=author_ids).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:limit]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=date)
+            for post_id, date in posts
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow_added(user_id, author_id):
+    """
+    Добавляет в ленту подписчика последние посты нового автора.
+    """
+    if not is_celebrity(author_id):
+        _fill(user_id, [author_id], max_entries())
+
+
+def follow_removed(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def celebrity_ids(user):
+    """
+    Популярные авторы из подписок пользователя. Если граф подписок
+    в памяти актуален, таблица Follow не читается; иначе подписки
+    берутся подзапросом, а не отдельным запросом загрузки графа.
+    """
+    author_ids = follow_graph.following(user.pk, load_missing=False)
+    if author_ids is None or len(author_ids) > FOLLOWING_IN_LIMIT:
+        return Follow.objects.filter(
+            user=user, author__stats__followers_count__gt=fanout_threshold()
+        ).values_list('author_id', flat=True)
+    return UserStats.objects.filter(
+        user_id__in=list(author_ids),
+        followers_count__gt=fanout_threshold(),
+    ).values_list('user_id', flat=True)
+
+
+def window(queryset, pk_field, cursor=None, forward=True,
+           limit=POSTS_PER_PAGE + 1):
+    """
+    limit строк после курсора (forward) или перед ним в порядке
+    (-pub_date, -pk_field). Условие на курсор ограничивает pub_date
+    диапазоном, поэтому запрос остаётся range scan по индексу
+    (..., -pub_date, -pk) и останавливается на LIMIT.
+    """
+    if cursor is not None:
+        queryset = queryset.filter(cursor_filter(
+            'pub_date', pk_field, cursor, 'lt' if forward else 'gt'
+        ))
+    if forward:
+        ordering = ('-pub_date', f'-{pk_field}')
+    else:
+        ordering = ('pub_date', pk_field)
+    return queryset.order_by(*ordering)[:limit]
+
+
+def entry_posts(user, posts, cursor=None, forward=True,
+                limit=POSTS_PER_PAGE + 1):
+    """
+    Посты из материализованной ленты: id выбираются по индексу
+    timeline_user_date_idx, сами посты — по первичному ключу.
+    """
+    entries = window(TimelineEntry.objects.filter(user=user), 'post_id',
+                     cursor, forward, limit).values('post_id')
+    return posts.filter(id__in=entries).order_by()
+
+
+def _key(row):
+    # строки из values() приходят словарями
+    if isinstance(row, dict):
+        return row['pub_date'], row['id']
+    return row.pub_date, row.id
+
+
+class FollowFeed:
+    """
+    Лента подписок: материализованные записи плюс посты популярных
+    авторов, подмешанные при чтении. Каждый источник читается своим
+    запросом с LIMIT по индексу, результаты сливаются здесь: общий
+    запрос с OR SQLite выполняет как MULTI-INDEX OR по всей ленте
+    и сортирует её во временном B-tree.
+
+    Годится и для Paginator (count() и срезы), и для курсорных
+    страниц (page()). posts — queryset постов для выдачи: модели
+    или values().
+    """
+
+    def __init__(self, user, posts):
+        self.user = user
+        self.posts = posts
+
+    def window(self, cursor=None, forward=True, limit=POSTS_PER_PAGE + 1):
+        rows = list(entry_posts(self.user, self.posts, cursor, forward,
+                                limit))
+        rows += window(
+            self.posts.filter(author_id__in=celebrity_ids(self.user)), 'id',
+            cursor, forward, limit,
+        )
+        # пост автора, ставшего популярным после раскладки, есть в обоих
+        unique = {_key(row): row for row in rows}
+        keys = sorted(unique, reverse=forward)[:limit]
+        return [unique[key] for key in keys]
+
+    def count(self):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        return Post.objects.filter(
+            Q(id__in=entries.values('post_id'))
+            | Q(author_id__in=celebrity_ids(self.user))
+        ).count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step:
+            raise TypeError('FollowFeed supports only plain slices.')
+        start, stop = index.start or 0, index.stop
+        if stop is not None and stop <= start:
+            return []
+        return self.window(limit=stop)[start:stop]
+
+    def page(self, after=None, before=None, per_page=POSTS_PER_PAGE):
+        """
+        Курсорная страница после токена after или перед токеном before.
+        """
+        paginator = CursorPaginator(self.posts, per_page)
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        if before is not None:
+            cursor, direction = before, 'before'
+        elif after is not None:
+            cursor, direction = after, 'after'
+        else:
+            cursor, direction = None, None
+        rows = self.window(cursor, direction != 'before', per_page + 1)
+        page = paginator.make_page(rows, direction)
+        if page is None:
+            return self.page(per_page=per_page)
+        return page
+
+
+def paginate(request, user, posts, per_page=POSTS_PER_PAGE):
+    """
+    Страница ленты подписок для запроса: курсорная либо нумерованная.
+    """
+    feed = FollowFeed(user, posts)
+    if use_cursor(request):
+        return feed.page(request.GET.get('after'), request.GET.get('before'),
+                         per_page)
+    return Paginator(feed, per_page).get_page(request.GET.get('page'))
+
+
+def rebuild(user_ids=None):
+    """
+    Перестраивает ленты заново по таблице подписок.
+    Возвращает число обработанных пользователей.
+    """
+    follows = Follow.objects.exclude(
+        author__stats__followers_count__gt=fanout_threshold()
+    )
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+    authors_by_user = {}
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        authors_by_user.setdefault(user_id, []).append(author_id)
+
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+    for user_id, author_ids in authors_by_user.items():
+        _fill(user_id, author_ids, max_entries())
+    return len(authors_by_user)
+
+
+def trim(limit=None):
+    """
+    Оставляет в каждой ленте не больше limit самых свежих записей.
+    Возвращает число удалённых строк.
+    """
+    limit = limit or max_entries()
+    removed = 0
+    user_ids = TimelineEntry.objects.values_list(
+        'user_id', flat=True
+    ).distinct()
+    for user_id in user_ids.iterator():
+        cutoff = TimelineEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date'
+        ).values_list('pub_date', flat=True)[limit:limit + 1]
+        cutoff = list(cutoff)
+        if cutoff:
+            removed += TimelineEntry.objects.filter(
+                user_id=user_id, pub_date__lte=cutoff[0]
+            ).delete()[0]
+    return removed
@@ -5,6 +5,8 @@ from . import views
 urlpatterns = [
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('groups/', views.groups, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
@@ -14,9 +16,13 @@ urlpatterns = [
          name='post_delete'),
     path('<str:username>/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('<str:username>/unfollow/', views.profile_unfollow,
          name='profile_unfollow'),
+    path('<str:username>/export/', views.profile_export,
+         name='profile_export'),
     path('', views.index, name='index'),
 ]
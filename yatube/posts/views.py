@@ -1,56 +1,118 @@
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.http import (require_http_methods, require_GET,
-                                          require_POST)
+from django.views.decorators.http import (condition, require_http_methods,
+                                          require_GET, require_POST)
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
-from django.core.cache import cache
 
 from .models import Post, Group, Follow
 from .forms import PostForm, CommentForm
+from .pagination import (POSTS_PER_PAGE, detach_page, paginate,
+                         paginate_comments)
+from .search import search_posts
+from .export import EXPORT_FORMATS, iter_lines
+from . import caching, follow_graph, rollups, timeline
 
 User = get_user_model()
 
 
 def is_subscribed(user, follower):
-    return Follow.objects.filter(user=user, author=follower).exists()
+    return follow_graph.is_following(user.pk, follower.pk)
+
+
+def index_etag(request):
+    return caching.etag(request, [caching.FEED_TAG])
+
+
+def get_group(request, slug):
+    """
+    Группа из запроса; валидатор и представление делят один запрос к БД.
+    """
+    if not hasattr(request, '_posts_group'):
+        request._posts_group = Group.objects.filter(slug=slug).first()
+    return request._posts_group
+
+
+def get_author(request, username):
+    if not hasattr(request, '_posts_author'):
+        request._posts_author = User.objects.select_related(
+            'stats'
+        ).filter(username=username).first()
+    return request._posts_author
+
+
+def group_etag(request, slug):
+    group = get_group(request, slug)
+    if group is None:
+        return None
+    return caching.etag(request, [caching.group_tag(group.id)])
+
+
+def author_tags(request, username):
+    author = get_author(request, username)
+    if author is None:
+        return None
+    tags = [caching.author_tag(author.id), caching.follow_tag(author.id)]
+    if request.user.is_authenticated:
+        tags.append(caching.follow_tag(request.user.pk))
+    return tags
+
+
+def profile_etag(request, username):
+    tags = author_tags(request, username)
+    return tags and caching.etag(request, tags)
+
+
+def post_etag(request, username, post_id):
+    tags = author_tags(request, username)
+    return tags and caching.etag(request, tags + [caching.post_tag(post_id)])
+
+
+def comments_etag(request, username, post_id):
+    return caching.etag(request, [caching.post_tag(post_id)])
 
 
 @require_GET
+@condition(etag_func=index_etag)
+@caching.stale_not_stored
 def index(request):
-    page_number = request.GET.get('page')
-    if page_number is None:
-        page_number = '1'
-
-    page_key = f'posts-index-page-cache-{page_number}'
-    page = cache.get(page_key)
-    if page is None:
-        posts = Post.objects.all()
-        paginator = Paginator(posts, 10)
-        page = paginator.get_page(page_number)
-        cache.set(page_key, page, timeout=20)
-
+    page = caching.get_or_set(
+        f'posts-index-page-{caching.page_key(request)}',
+        [caching.FEED_TAG],
+        lambda: detach_page(paginate(request, Post.objects.for_feed())),
+    )
     return render(request, 'posts/index.html', {'page': page})
 
 
 @require_GET
+@condition(etag_func=group_etag)
+@caching.stale_not_stored
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = get_group(request, slug)
+    if group is None:
+        raise Http404
+    page = caching.get_or_set(
+        f'posts-group-page-{group.id}-{caching.page_key(request)}',
+        [caching.group_tag(group.id)],
+        lambda: detach_page(paginate(request, group.posts.for_feed())),
+    )
     return render(request, 'posts/group.html',
                   {'group': group, 'page': page})
 
 
 @require_GET
+@condition(etag_func=profile_etag)
+@caching.stale_not_stored
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_author(request, username)
+    if author is None:
+        raise Http404
+    page = caching.get_or_set(
+        f'posts-profile-page-{author.id}-{caching.page_key(request)}',
+        [caching.author_tag(author.id)],
+        lambda: detach_page(paginate(request, author.posts.for_feed())),
+    )
     following = False
     if request.user.is_authenticated:
         following = is_subscribed(request.user, author)
@@ -59,11 +121,36 @@ def profile(request, username):
 
 
 @require_GET
+@condition(etag_func=index_etag)
+@caching.stale_not_stored
+def groups(request):
+    page = caching.get_or_set(
+        f'groups-directory-{caching.page_key(request)}',
+        [caching.FEED_TAG],
+        lambda: detach_page(rollups.directory(request.GET.get('page'))),
+    )
+    return render(request, 'posts/groups.html', {'page': page})
+
+
+@require_GET
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search_posts(query), POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'posts/search.html',
+                  {'query': query, 'page': page})
+
+
+@require_GET
+@condition(etag_func=post_etag)
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    author = get_author(request, username)
+    if author is None:
+        raise Http404
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id,
+                             author__username=username)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = paginate_comments(post, after=request.GET.get('after'))
     context = {
         'author': author,
         'post': post,
@@ -73,6 +160,17 @@ def post_view(request, username, post_id):
     return render(request, 'posts/post.html', context)
 
 
+@require_GET
+@condition(etag_func=comments_etag)
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев для подгрузки на странице поста."""
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             id=post_id, author__username=username)
+    comments = paginate_comments(post, after=request.GET.get('after'))
+    return render(request, 'comment_list.html',
+                  {'post': post, 'comments': comments})
+
+
 @login_required
 @require_http_methods(['GET', 'POST'])
 def new_post(request):
@@ -130,11 +228,7 @@ def add_comment(request, username, post_id):
 @login_required
 @require_GET
 def follow_index(request):
-    user = request.user
-    posts = Post.objects.filter(author__following__user=user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = timeline.paginate(request, request.user, Post.objects.for_feed())
     return render(request, 'posts/follow.html', {'page': page})
 
 
@@ -160,3 +254,22 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     get_object_or_404(Follow, user=user, author=author).delete()
     return redirect('profile', username=username)
+
+
+@login_required
+@require_GET
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author:
+        return redirect('profile', username=username)
+
+    fmt = request.GET.get('format')
+    if fmt not in EXPORT_FORMATS:
+        fmt = 'ndjson'
+    response = StreamingHttpResponse(
+        iter_lines(author, fmt), content_type=EXPORT_FORMATS[fmt]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{fmt}"'
+    )
+    return response
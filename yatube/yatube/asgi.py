@@ -0,0 +1,21 @@
+"""
+ASGI config for the read-only feed gateway.
+
+Serves the index, group, profile and post pages (and their /api/v1/
+JSON twins) from one event loop; everything else stays on the WSGI
+application. Requires the optional aiosqlite package and an ASGI
+server, e.g.::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from core.gateway import FeedGateway  # noqa: E402
+
+application = FeedGateway()
@@ -47,11 +47,13 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,9 +61,29 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+# Доля запросов, замеряемых TimingMiddleware (0 — выключить).
+# Запросы с INTERNAL_IPS замеряются всегда.
+TIMING_SAMPLE_RATE = float(os.getenv('TIMING_SAMPLE_RATE', 0.01))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.timing': {
+            'handlers': ['console'],
+            'level': os.getenv('TIMING_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -86,6 +108,26 @@ TEMPLATES = [
     },
 ]
 
+# Профиль шаблонов: development (перечитываются с диска) или production
+# (кэширующий загрузчик); по умолчанию следует DEBUG
+TEMPLATE_PROFILE = os.getenv(
+    'TEMPLATE_PROFILE', 'development' if DEBUG else 'production'
+)
+
+if TEMPLATE_PROFILE == 'production':
+    # скомпилированные шаблоны живут в памяти процесса до перезапуска;
+    # прогреть их при старте можно командой warmup
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    # debug_toolbar требует APP_DIRS, но его шаблоны находит
+    # app_directories.Loader внутри кэширующего
+    SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
@@ -98,6 +140,24 @@ DATABASES = {
     }
 }
 
+# Профиль базы: development или production (WAL, постоянные соединения)
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
+
+# PRAGMA, применяемые к каждому соединению с SQLite (см. core/db.py)
+SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['OPTIONS'] = {'timeout': 5}
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -154,3 +214,48 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+if os.getenv('CACHE_BACKEND') == 'sqlite':
+    # общий для всех воркеров хоста кэш в файле SQLite (WAL)
+    CACHES['default'] = {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 50000)),
+            'MAX_SIZE': int(os.getenv('CACHE_MAX_SIZE', 256 * 1024 * 1024)),
+        },
+    }
+
+# Виден ли кэш всем процессам. LocMemCache у каждого воркера свой:
+# сдвиг версии тега при записи видит только обработавший её воркер
+POSTS_SHARED_CACHE = (
+    CACHES['default']['BACKEND']
+    != 'django.core.cache.backends.locmem.LocMemCache'
+)
+
+# Курсорная пагинация лент (?after=/?before=) вместо номеров страниц
+POSTS_CURSOR_PAGINATION = os.getenv('POSTS_CURSOR_PAGINATION') == 'True'
+
+# Лента подписок: авторов с числом подписчиков выше порога
+# подмешиваем при чтении, остальных раскладываем по лентам при публикации
+TIMELINE_FANOUT_THRESHOLD = 1000
+TIMELINE_MAX_ENTRIES = 1000
+
+# Время жизни закэшированных лент. С общим кэшем актуальность
+# обеспечивают теги; с кэшем на процесс инвалидацию видит только
+# один воркер, и остальные отдают старую ленту до истечения срока
+POSTS_CACHE_TIMEOUT = 60 * 60 if POSTS_SHARED_CACHE else 20
+
+# Процессы для фоновой генерации миниатюр; 0 — генерировать сразу
+POSTS_THUMBNAIL_WORKERS = int(os.getenv('POSTS_THUMBNAIL_WORKERS', 2))
+
+# Идентификатор выпуска: входит в ETag, чтобы после деплоя
+# клиенты не получали 304 на страницы со старой вёрсткой
+RELEASE = os.getenv('RELEASE', '')
+
+# Соединения aiosqlite у асинхронного шлюза чтения (yatube/asgi.py)
+GATEWAY_DB_CONNECTIONS = int(os.getenv('GATEWAY_DB_CONNECTIONS', 4))
+
+# Прогрев шаблонов и URL при старте WSGI-воркера
+WARMUP_ON_BOOT = os.getenv('WARMUP_ON_BOOT', 'True') == 'True'
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_BOOT:
+    # шаблоны и URL готовим до первого запроса, а не во время него
+    from core.warmup import warm_up
+
+    warm_up()